@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Time-based tweens for the game's animations.
+
+Animations are driven by elapsed time rather than frame count, so they run
+at the same speed at any frame rate. Finished tweens are retired by
+Animator.update(), which lets the caller bake them into a static layer
+and only pay per frame for animations that are still running.
+"""
+
+
+def linear(t):
+    """No easing"""
+    return t
+
+
+def ease_out_cubic(t):
+    """Start fast and slow down towards the end"""
+    return 1 - (1 - t) ** 3
+
+
+def ease_in_out_quad(t):
+    """Speed up through the first half and slow down through the second"""
+    if t < 0.5:
+        return 2 * t * t
+    return 1 - (-2 * t + 2) ** 2 / 2
+
+
+def lerp_color(start, end, t):
+    """Blend between two RGB colors"""
+    return tuple(int(a + (b - a) * t) for a, b in zip(start, end))
+
+
+class Tween:
+    """A value running from 0 to 1 over a fixed duration"""
+
+    __slots__ = ('start', 'duration', 'easing')
+
+    def __init__(self, start, duration, easing=linear):
+        self.start = start
+        self.duration = duration
+        self.easing = easing
+
+    def progress(self, now):
+        """Return the eased progress at time now"""
+        if self.duration <= 0:
+            return 1.0
+        t = (now - self.start) / self.duration
+        return self.easing(min(max(t, 0.0), 1.0))
+
+    def finished(self, now):
+        """Check if the tween has run its full duration"""
+        return now - self.start >= self.duration
+
+
+class Animator:
+    """Keeps the running tweens by key and retires them when they finish"""
+
+    def __init__(self):
+        self.tweens = {}
+
+    def start(self, key, now, duration, easing=linear):
+        """Start (or restart) the animation for key"""
+        self.tweens[key] = Tween(now, duration, easing)
+
+    def is_running(self, key):
+        """Check if key has an animation that has not been retired"""
+        return key in self.tweens
+
+    def progress(self, key, now):
+        """Return the eased progress for key, 1.0 once it has been retired"""
+        tween = self.tweens.get(key)
+        if tween is None:
+            return 1.0
+        return tween.progress(now)
+
+    def update(self, now):
+        """Retire finished animations and return their keys"""
+        retired = [key for key, tween in self.tweens.items() if tween.finished(now)]
+        for key in retired:
+            del self.tweens[key]
+        return retired
+
+    def clear(self):
+        """Drop every running animation"""
+        self.tweens.clear()
+
+    def __iter__(self):
+        return iter(list(self.tweens))
+
+    def __len__(self):
+        return len(self.tweens)
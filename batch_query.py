@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Query the AI's move and evaluation for a stream of positions.
+
+Positions are read one per line as 9-character strings in row-major order,
+using 'X', 'O' and any of '.', '-', '_' or ' ' for empty squares. With
+--packed, positions are 2-byte little-endian base-3 indices instead
+(0 empty, 1 X, 2 O, with the top-left square as the lowest digit).
+
+Each output line holds the position, the chosen square (0-8, row-major)
+and the evaluation of that move for the side to move (1 win, 0 draw, -1
+loss with perfect play afterwards), using '-' for finished games and lines
+that are not valid positions. With --player auto, positions whose mark
+counts cannot come from alternating moves are invalid.
+
+    python3 batch_query.py --difficulty Hard positions.txt > moves.tsv
+    python3 batch_query.py --difficulty Expert --workers 4 < positions.txt
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+from collections import deque
+
+import game_ai
+import policy_table
+
+CHUNK_SIZE = 20000  # Positions handed to a worker at a time
+EMPTY_CHARS = '.-_ '
+MARKS = {'X': 'X', 'x': 'X', 'O': 'O', 'o': 'O'}
+MARKS.update((char, None) for char in EMPTY_CHARS)
+# Spells every way of writing a position the same, so the cache has one entry per position
+NORMALIZE = bytes.maketrans(b'xo' + EMPTY_CHARS[1:].encode(), b'XO' + b'.' * (len(EMPTY_CHARS) - 1))
+
+
+def decode_text(line):
+    """Parse a 9-character position, returning a flat tuple of cells or None"""
+    text = line.decode('ascii', 'replace').rstrip('\r\n')
+    if len(text) != 9:
+        return None
+    try:
+        return tuple(MARKS[char] for char in text)
+    except KeyError:
+        return None
+
+
+def decode_packed(index):
+    """Unpack a base-3 position index into a flat tuple of cells"""
+    if index >= policy_table.NUM_POSITIONS:
+        return None
+    cells = []
+    for _ in range(policy_table.NUM_CELLS):
+        index, digit = divmod(index, 3)
+        cells.append((None, 'X', 'O')[digit])
+    return tuple(cells)
+
+
+def format_position(cells):
+    """Format flat cells as a 9-character position string"""
+    return ''.join(mark or '.' for mark in cells)
+
+
+class Answerer:
+    """Answers position queries, caching the outcome of every distinct position"""
+
+    def __init__(self, difficulty, player='auto', policy=None, seed=None):
+        self.difficulty = difficulty
+        self.player = player
+        self.policy = policy
+        self.rng = random.Random(seed)
+        # Keyed by position, never by raw input, so it holds at most 3^9 entries
+        self.cache = {}
+
+    def side_to_move(self, cells):
+        """Work out whose move it is, or None if the mark counts are impossible"""
+        if self.player != 'auto':
+            return self.player
+        x_count, o_count = cells.count('X'), cells.count('O')
+        if x_count == o_count:
+            return 'X'
+        if x_count == o_count + 1:
+            return 'O'
+        return None
+
+    def outcomes(self, cells):
+        """Return (output line endings the AI may produce, valid) for a position"""
+        player = None if cells is None else self.side_to_move(cells)
+        if player is None:
+            return (b"\t-\t-\n",), False
+
+        board = [list(cells[row * 3:row * 3 + 3]) for row in range(3)]
+        moves = game_ai.candidate_moves(board, self.difficulty, player, self.policy)
+        if not moves:
+            return (b"\t-\t-\n",), True
+
+        # Value the move actually chosen, so a weaker difficulty's mistakes show
+        opponent = game_ai.opponent_of(player)
+        endings = []
+        for row, col in moves:
+            board[row][col] = player
+            value = -game_ai.evaluate(board, opponent)
+            board[row][col] = None
+            endings.append(f"\t{row * 3 + col}\t{value}\n".encode())
+        return tuple(endings), True
+
+    def answer(self, records, packed):
+        """Answer a chunk of records, returning (output bytes, invalid count)"""
+        cache = self.cache
+        choice = self.rng.choice
+        out = []
+        invalid = 0
+        for record in records:
+            if packed:
+                key = record
+            else:
+                record = record.rstrip(b'\r\n')
+                key = record.translate(NORMALIZE)
+            entry = cache.get(key)
+            if entry is None:
+                cells = decode_packed(record) if packed else decode_text(key)
+                endings, valid = self.outcomes(cells)
+                # Packed positions are echoed as text, the rest exactly as they were given
+                position = format_position(cells).encode() if packed and cells is not None else None
+                entry = endings, valid, position
+                if cells is not None:
+                    cache[key] = entry
+            endings, valid, position = entry
+            if not valid:
+                invalid += 1
+            if position is None:
+                position = str(record).encode() if packed else record
+            out.append(position + (endings[0] if len(endings) == 1 else choice(endings)))
+        return b''.join(out), invalid
+
+
+def read_records(stream, packed, chunk_size=CHUNK_SIZE):
+    """Yield chunks of raw records from a binary stream"""
+    if packed:
+        leftover = b''
+        while True:
+            data = stream.read(chunk_size * 2)
+            if not data:
+                break
+            # Pipes can return an odd number of bytes, so carry a split record over
+            data = leftover + data
+            end = len(data) - len(data) % 2
+            leftover = data[end:]
+            if not end:
+                continue
+            records = array('H')
+            records.frombytes(data[:end])
+            if sys.byteorder == 'big':
+                records.byteswap()
+            yield records.tolist()
+        if leftover:
+            print("Ignored 1 trailing byte: the packed input ends partway through a position",
+                  file=sys.stderr)
+    else:
+        while True:
+            lines = stream.readlines(chunk_size * 10)
+            if not lines:
+                return
+            yield lines
+
+
+_worker_answerer = None
+
+
+def _init_worker(difficulty, player, policy, seed):
+    """Give each worker process its own answerer"""
+    global _worker_answerer
+    _worker_answerer = Answerer(difficulty, player, policy, seed)
+
+
+def _answer_chunk(records, packed):
+    """Answer one chunk in a worker process"""
+    return _worker_answerer.answer(records, packed)
+
+
+def run(args, source, sink):
+    """Stream positions from source to sink, returning (positions, invalid)"""
+    policy = None
+    if args.difficulty == 'Learned':
+        policy = policy_table.load_policy(args.policy)
+        if policy is None:
+            print(f"Learned policy not found at {args.policy}, playing like 'Hard'.",
+                  file=sys.stderr)
+
+    total = invalid = 0
+    chunks = read_records(source, args.packed)
+    if args.workers <= 1:
+        answerer = Answerer(args.difficulty, args.player, policy, args.seed)
+        for records in chunks:
+            output, bad = answerer.answer(records, args.packed)
+            sink.write(output)
+            total += len(records)
+            invalid += bad
+        return total, invalid
+
+    # Keep a bounded number of chunks in flight so memory stays constant
+    with multiprocessing.Pool(args.workers, _init_worker,
+                              (args.difficulty, args.player, policy, args.seed)) as pool:
+        pending = deque()
+        for records in chunks:
+            pending.append((len(records), pool.apply_async(_answer_chunk, (records, args.packed))))
+            while len(pending) >= args.workers * 2 or (pending and pending[0][1].ready()):
+                count, result = pending.popleft()
+                output, bad = result.get()
+                sink.write(output)
+                total += count
+                invalid += bad
+        while pending:
+            count, result = pending.popleft()
+            output, bad = result.get()
+            sink.write(output)
+            total += count
+            invalid += bad
+    return total, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch query the AI's moves for many positions")
+    parser.add_argument('input', nargs='?', default='-', help="position file (default: stdin)")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('-d', '--difficulty', choices=game_ai.DIFFICULTIES, default='Hard')
+    parser.add_argument('--player', choices=('auto', 'X', 'O'), default='auto',
+                        help="side to move (default: from the mark counts; give it for "
+                             "games with skipped turns)")
+    parser.add_argument('--packed', action='store_true', help="read 2-byte packed positions")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="worker processes")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for tie-breaks")
+    parser.add_argument('--policy', default=policy_table.POLICY_FILE,
+                        help="policy table for the Learned difficulty")
+    args = parser.parse_args()
+
+    buffer_size = 1 << 20
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb', buffer_size)
+    sink = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb', buffer_size)
+
+    start = time.perf_counter()
+    try:
+        total, invalid = run(args, source, sink)
+    finally:
+        sink.flush()
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    elapsed = time.perf_counter() - start
+
+    rate = total / elapsed * 60 if elapsed > 0 else 0
+    print(f"{total} positions in {elapsed:.2f}s ({rate:,.0f} positions/min)", file=sys.stderr)
+    if invalid:
+        print(f"Skipped {invalid} invalid positions", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
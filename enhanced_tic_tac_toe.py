@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
+import argparse
 import pygame
 import sys
 import time
-import random
 import math
 
-# Initialize pygame
-pygame.init()
-pygame.mixer.init()  # Initialize sound mixer
+import animation
+import frame_profiler
+import spectator
+import game_ai
+import parallel_search
+import policy_table
 
 # Constants
 WIDTH, HEIGHT = 600, 700  # Increased height for score display
@@ -32,10 +35,16 @@ X_SCORE_COLOR = (255, 100, 100)
 O_SCORE_COLOR = (100, 100, 255)
 TIMER_COLOR = (255, 215, 0)
 
-# Set up the display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Enhanced Tic Tac Toe')
-screen.fill(BG_COLOR)
+# Animation
+PIECE_ANIMATION_TIME = 0.25  # Seconds to draw an X or O
+WIN_LINE_ANIMATION_TIME = 0.5  # Seconds to sweep the winning line across
+STATUS_ANIMATION_TIME = 0.3  # Seconds to fade between status messages
+WIN_LINE_KEY = 'win_line'
+STATUS_KEY = 'status'
+
+# AI search
+AI_TIME_BUDGET = 2.0  # Seconds the Expert AI may think per move
+AI_MOVE_DELAY = 0.5  # Minimum seconds before the computer moves
 
 # Board
 board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
@@ -44,119 +53,182 @@ winner = None
 player = 'X'
 scores = {'X': 0, 'O': 0, 'Draws': 0}
 game_mode = 'PVP'  # PVP (Player vs Player) or PVC (Player vs Computer)
-difficulty = 'Easy'  # Easy, Medium, Hard
-animation_progress = {}  # For tracking animation progress
+difficulty = 'Easy'  # Easy, Medium, Learned, Hard, Expert
+animations = animation.Animator()  # Running animations, keyed by cell, WIN_LINE_KEY or STATUS_KEY
+winning_line = None  # ('vertical' | 'horizontal' | 'diagonal', index) once someone wins
+board_layer = None  # Cached board lines, settled pieces and finished winning line
+board_layer_dirty = True
+shown_status = None  # Status the status area is showing or fading towards
 turn_timer = 10  # Seconds per turn
 timer_start = time.time()
+search_pool = None  # Worker pool for the Expert AI, started on first use
+ai_search = None  # Expert AI search in progress
+publisher = None  # Spectator stream publisher, when --spectate is given
+last_tick = None  # (player, seconds) last sent to spectators
+
+# Sounds, learned policy and fonts, set up by init()
+move_sound = None
+win_sound = None
+draw_sound = None
+learned_policy = None
+font = small_font = score_font = timer_font = None
+
+def init():
+    """Start pygame and load the sounds, learned policy and fonts
+
+    Kept out of module import so the Expert AI's worker processes, which
+    import this module, never start SDL or the sound mixer themselves.
+    """
+    global move_sound, win_sound, draw_sound, learned_policy
+    global font, small_font, score_font, timer_font
+
+    # Initialize pygame
+    pygame.init()
+
+    # Load sounds
+    try:
+        pygame.mixer.init()  # Initialize sound mixer
+        # Create dummy sounds since we don't have real sound files
+        dummy_surface = pygame.Surface((2, 2))
+        dummy_array = pygame.surfarray.array3d(dummy_surface)
+        # Just set sound variables to None and handle in the code
+        move_sound = None
+        win_sound = None
+        draw_sound = None
+        print("Using silent sounds.")
+    except:
+        move_sound = None
+        win_sound = None
+        draw_sound = None
+        print("Sound system disabled.")
+
+    # Load learned policy (trained by train_policy.py)
+    learned_policy = policy_table.load_policy()
+    if learned_policy is None:
+        print("Learned policy not found, 'Learned' AI will play like 'Hard'.")
+
+    # Fonts
+    font = pygame.font.SysFont('Arial', 40)
+    small_font = pygame.font.SysFont('Arial', 30)
+    score_font = pygame.font.SysFont('Arial', 24)
+    timer_font = pygame.font.SysFont('Arial', 20)
 
-# Load sounds
-try:
-    # Create dummy sounds since we don't have real sound files
-    dummy_surface = pygame.Surface((2, 2))
-    dummy_array = pygame.surfarray.array3d(dummy_surface)
-    # Just set sound variables to None and handle in the code
-    move_sound = None
-    win_sound = None
-    draw_sound = None
-    print("Using silent sounds.")
-except:
-    move_sound = None
-    win_sound = None
-    draw_sound = None
-    print("Sound system disabled.")
-
-# Fonts
-font = pygame.font.SysFont('Arial', 40)
-small_font = pygame.font.SysFont('Arial', 30)
-score_font = pygame.font.SysFont('Arial', 24)
-timer_font = pygame.font.SysFont('Arial', 20)
-
-def draw_lines():
+def draw_lines(surface=None):
     """Draw the board lines"""
+    if surface is None:
+        surface = screen
     # Horizontal lines
-    pygame.draw.line(screen, LINE_COLOR, (0, SQUARE_SIZE), (WIDTH, SQUARE_SIZE), LINE_WIDTH)
-    pygame.draw.line(screen, LINE_COLOR, (0, 2 * SQUARE_SIZE), (WIDTH, 2 * SQUARE_SIZE), LINE_WIDTH)
+    pygame.draw.line(surface, LINE_COLOR, (0, SQUARE_SIZE), (WIDTH, SQUARE_SIZE), LINE_WIDTH)
+    pygame.draw.line(surface, LINE_COLOR, (0, 2 * SQUARE_SIZE), (WIDTH, 2 * SQUARE_SIZE), LINE_WIDTH)
     
     # Vertical lines
-    pygame.draw.line(screen, LINE_COLOR, (SQUARE_SIZE, 0), (SQUARE_SIZE, HEIGHT - 100), LINE_WIDTH)
-    pygame.draw.line(screen, LINE_COLOR, (2 * SQUARE_SIZE, 0), (2 * SQUARE_SIZE, HEIGHT - 100), LINE_WIDTH)
+    pygame.draw.line(surface, LINE_COLOR, (SQUARE_SIZE, 0), (SQUARE_SIZE, HEIGHT - 100), LINE_WIDTH)
+    pygame.draw.line(surface, LINE_COLOR, (2 * SQUARE_SIZE, 0), (2 * SQUARE_SIZE, HEIGHT - 100), LINE_WIDTH)
 
-def draw_figures():
-    """Draw X's and O's on the board with animation"""
+def draw_piece(surface, row, col, mark, progress=1.0):
+    """Draw an X or O, partly drawn if progress is below 1"""
+    if mark == 'X':
+        if progress >= 1:
+            # Draw complete X
+            pygame.draw.line(
+                surface, CROSS_COLOR,
+                (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
+                ((col + 1) * SQUARE_SIZE - SPACE, (row + 1) * SQUARE_SIZE - SPACE),
+                CROSS_WIDTH
+            )
+            pygame.draw.line(
+                surface, CROSS_COLOR,
+                ((col + 1) * SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE),
+                (col * SQUARE_SIZE + SPACE, (row + 1) * SQUARE_SIZE - SPACE),
+                CROSS_WIDTH
+            )
+        elif progress <= 0.5:
+            # Draw first line of X
+            end_point = progress * 2  # Scale from 0-0.5 to 0-1
+            pygame.draw.line(
+                surface, CROSS_COLOR,
+                (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
+                (col * SQUARE_SIZE + SPACE + end_point * (SQUARE_SIZE - 2 * SPACE), 
+                 row * SQUARE_SIZE + SPACE + end_point * (SQUARE_SIZE - 2 * SPACE)),
+                CROSS_WIDTH
+            )
+        else:
+            # Draw complete first line
+            pygame.draw.line(
+                surface, CROSS_COLOR,
+                (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
+                ((col + 1) * SQUARE_SIZE - SPACE, (row + 1) * SQUARE_SIZE - SPACE),
+                CROSS_WIDTH
+            )
+            # Draw second line of X
+            end_point = (progress - 0.5) * 2  # Scale from 0.5-1 to 0-1
+            pygame.draw.line(
+                surface, CROSS_COLOR,
+                ((col + 1) * SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE),
+                ((col + 1) * SQUARE_SIZE - SPACE - end_point * (SQUARE_SIZE - 2 * SPACE),
+                 row * SQUARE_SIZE + SPACE + end_point * (SQUARE_SIZE - 2 * SPACE)),
+                CROSS_WIDTH
+            )
+    elif mark == 'O':
+        if progress >= 1:
+            # Draw complete O
+            pygame.draw.circle(
+                surface, CIRCLE_COLOR,
+                (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2),
+                CIRCLE_RADIUS, CIRCLE_WIDTH
+            )
+        else:
+            # Animated O
+            pygame.draw.arc(
+                surface, CIRCLE_COLOR,
+                (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE,
+                 SQUARE_SIZE - 2 * SPACE, SQUARE_SIZE - 2 * SPACE),
+                0, progress * 2 * math.pi, CIRCLE_WIDTH
+            )
+
+def draw_figures(now=None):
+    """Draw the X's, O's and winning line that are still animating"""
+    if now is None:
+        now = time.time()
+    # Finished pieces are already in the board layer, so only running ones cost anything
+    for key in animations:
+        if key in (WIN_LINE_KEY, STATUS_KEY):
+            continue
+        row, col = key
+        draw_piece(screen, row, col, board[row][col], animations.progress(key, now))
+
+    if animations.is_running(WIN_LINE_KEY):
+        draw_winning_line(screen, animations.progress(WIN_LINE_KEY, now))
+
+def render_board_layer():
+    """Redraw the cached layer holding the lines, settled pieces and finished winning line"""
+    global board_layer, board_layer_dirty
+    if board_layer is None:
+        board_layer = pygame.Surface((WIDTH, HEIGHT - 100))
+    board_layer.fill(BG_COLOR)
+    draw_lines(board_layer)
     for row in range(BOARD_ROWS):
         for col in range(BOARD_COLS):
-            pos = (row, col)
-            if pos in animation_progress:
-                progress = animation_progress[pos]
-                if board[row][col] == 'X':
-                    # Animated X
-                    if progress <= 0.5:
-                        # Draw first line of X
-                        end_point = progress * 2  # Scale from 0-0.5 to 0-1
-                        pygame.draw.line(
-                            screen, CROSS_COLOR,
-                            (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
-                            (col * SQUARE_SIZE + SPACE + end_point * (SQUARE_SIZE - 2 * SPACE), 
-                             row * SQUARE_SIZE + SPACE + end_point * (SQUARE_SIZE - 2 * SPACE)),
-                            CROSS_WIDTH
-                        )
-                    else:
-                        # Draw complete first line
-                        pygame.draw.line(
-                            screen, CROSS_COLOR,
-                            (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
-                            ((col + 1) * SQUARE_SIZE - SPACE, (row + 1) * SQUARE_SIZE - SPACE),
-                            CROSS_WIDTH
-                        )
-                        # Draw second line of X
-                        end_point = (progress - 0.5) * 2  # Scale from 0.5-1 to 0-1
-                        pygame.draw.line(
-                            screen, CROSS_COLOR,
-                            ((col + 1) * SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE),
-                            ((col + 1) * SQUARE_SIZE - SPACE - end_point * (SQUARE_SIZE - 2 * SPACE),
-                             row * SQUARE_SIZE + SPACE + end_point * (SQUARE_SIZE - 2 * SPACE)),
-                            CROSS_WIDTH
-                        )
-                elif board[row][col] == 'O':
-                    # Animated O
-                    pygame.draw.arc(
-                        screen, CIRCLE_COLOR,
-                        (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE,
-                         SQUARE_SIZE - 2 * SPACE, SQUARE_SIZE - 2 * SPACE),
-                        0, progress * 2 * math.pi, CIRCLE_WIDTH
-                    )
-                
-                # Update animation progress
-                animation_progress[pos] += 0.1
-                if animation_progress[pos] >= 1:
-                    animation_progress[pos] = 1
-            
-            elif board[row][col] == 'X':
-                # Draw complete X
-                pygame.draw.line(
-                    screen, CROSS_COLOR,
-                    (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
-                    ((col + 1) * SQUARE_SIZE - SPACE, (row + 1) * SQUARE_SIZE - SPACE),
-                    CROSS_WIDTH
-                )
-                pygame.draw.line(
-                    screen, CROSS_COLOR,
-                    ((col + 1) * SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE),
-                    (col * SQUARE_SIZE + SPACE, (row + 1) * SQUARE_SIZE - SPACE),
-                    CROSS_WIDTH
-                )
-            elif board[row][col] == 'O':
-                # Draw complete O
-                pygame.draw.circle(
-                    screen, CIRCLE_COLOR,
-                    (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2),
-                    CIRCLE_RADIUS, CIRCLE_WIDTH
-                )
-
-def mark_square(row, col, player):
+            if board[row][col] is not None and not animations.is_running((row, col)):
+                draw_piece(board_layer, row, col, board[row][col])
+    if winning_line is not None and not animations.is_running(WIN_LINE_KEY):
+        draw_winning_line(board_layer)
+    board_layer_dirty = False
+
+def update_animations(now):
+    """Retire finished animations into the board layer"""
+    retired = animations.update(now)
+    if board_layer is None or board_layer_dirty or any(key != STATUS_KEY for key in retired):
+        render_board_layer()
+
+def mark_square(row, col, player, now=None):
     """Mark a square with X or O and start animation"""
+    if now is None:
+        now = time.time()
     board[row][col] = player
-    animation_progress[(row, col)] = 0.1  # Start animation
+    if publisher is not None:
+        publisher.move(row, col, player)
+    animations.start((row, col), now, PIECE_ANIMATION_TIME, animation.ease_out_cubic)
     try:
         if move_sound:
             move_sound.play()
@@ -176,68 +248,71 @@ def is_board_full():
     print("Board is full - it's a draw!")
     return True
 
-def check_win():
+def check_win(now=None):
     """Check if someone has won"""
     # Check vertical win
     for col in range(BOARD_COLS):
         if board[0][col] == board[1][col] == board[2][col] and board[0][col] is not None:
-            draw_vertical_winning_line(col)
-            return board[0][col]
+            return start_winning_line(('vertical', col), board[0][col], now)
 
     # Check horizontal win
     for row in range(BOARD_ROWS):
         if board[row][0] == board[row][1] == board[row][2] and board[row][0] is not None:
-            draw_horizontal_winning_line(row)
-            return board[row][0]
+            return start_winning_line(('horizontal', row), board[row][0], now)
 
     # Check diagonal win (top-left to bottom-right)
     if board[0][0] == board[1][1] == board[2][2] and board[0][0] is not None:
-        draw_diagonal_winning_line(0)
-        return board[0][0]
+        return start_winning_line(('diagonal', 0), board[0][0], now)
 
     # Check diagonal win (top-right to bottom-left)
     if board[0][2] == board[1][1] == board[2][0] and board[0][2] is not None:
-        draw_diagonal_winning_line(1)
-        return board[0][2]
+        return start_winning_line(('diagonal', 1), board[0][2], now)
 
     return None
 
-def draw_vertical_winning_line(col):
+def start_winning_line(line, mark, now=None):
+    """Remember the winning line, start sweeping it in and return the winner"""
+    global winning_line
+    if now is None:
+        now = time.time()
+    winning_line = line
+    animations.start(WIN_LINE_KEY, now, WIN_LINE_ANIMATION_TIME, animation.ease_in_out_quad)
+    return mark
+
+def draw_winning_line(surface, progress=1.0):
+    """Draw the current winning line, swept in as far as progress"""
+    kind, index = winning_line
+    if kind == 'vertical':
+        draw_vertical_winning_line(index, progress, surface)
+    elif kind == 'horizontal':
+        draw_horizontal_winning_line(index, progress, surface)
+    else:
+        draw_diagonal_winning_line(index, progress, surface)
+
+def draw_sweep_line(surface, start, end, progress):
+    """Draw a winning line from start towards end, as far as progress"""
+    if surface is None:
+        surface = screen
+    tip = (start[0] + (end[0] - start[0]) * progress,
+           start[1] + (end[1] - start[1]) * progress)
+    pygame.draw.line(surface, (255, 50, 50), start, tip, 15)
+
+def draw_vertical_winning_line(col, progress=1.0, surface=None):
     """Draw a vertical line for a win"""
     posX = col * SQUARE_SIZE + SQUARE_SIZE // 2
-    pygame.draw.line(
-        screen, (255, 50, 50),
-        (posX, 15),
-        (posX, HEIGHT - 115),
-        15
-    )
-
-def draw_horizontal_winning_line(row):
+    draw_sweep_line(surface, (posX, 15), (posX, HEIGHT - 115), progress)
+
+def draw_horizontal_winning_line(row, progress=1.0, surface=None):
     """Draw a horizontal line for a win"""
     posY = row * SQUARE_SIZE + SQUARE_SIZE // 2
-    pygame.draw.line(
-        screen, (255, 50, 50),
-        (15, posY),
-        (WIDTH - 15, posY),
-        15
-    )
-
-def draw_diagonal_winning_line(direction):
+    draw_sweep_line(surface, (15, posY), (WIDTH - 15, posY), progress)
+
+def draw_diagonal_winning_line(direction, progress=1.0, surface=None):
     """Draw a diagonal line for a win"""
     if direction == 0:  # top-left to bottom-right
-        pygame.draw.line(
-            screen, (255, 50, 50),
-            (15, 15),
-            (WIDTH - 15, HEIGHT - 115),
-            15
-        )
+        draw_sweep_line(surface, (15, 15), (WIDTH - 15, HEIGHT - 115), progress)
     else:  # top-right to bottom-left
-        pygame.draw.line(
-            screen, (255, 50, 50),
-            (WIDTH - 15, 15),
-            (15, HEIGHT - 115),
-            15
-        )
+        draw_sweep_line(surface, (WIDTH - 15, 15), (15, HEIGHT - 115), progress)
 
 def draw_status_area():
     """Draw the status area at the bottom of the screen"""
@@ -261,9 +336,19 @@ def draw_status_area():
         diff_text = score_font.render(f"AI: {difficulty}", True, TEXT_COLOR)
         screen.blit(diff_text, (WIDTH - 150, HEIGHT - 60))
 
-def draw_status():
+def draw_status(now=None):
     """Draw game status text"""
+    global shown_status
+    if now is None:
+        now = time.time()
     draw_status_area()
+
+    # Fade in whenever the status changes
+    status = (game_over, winner, player)
+    if status != shown_status:
+        shown_status = status
+        animations.start(STATUS_KEY, now, STATUS_ANIMATION_TIME, animation.ease_out_cubic)
+    fade = animations.progress(STATUS_KEY, now)
     
     if game_over:
         if winner:
@@ -282,6 +367,7 @@ def draw_status():
                 pass
         
         text_surface = font.render(text, True, TEXT_COLOR)
+        text_surface.set_alpha(int(255 * fade))
         text_rect = text_surface.get_rect(center=(WIDTH // 2, HEIGHT - 70))
         screen.blit(text_surface, text_rect)
         
@@ -298,9 +384,9 @@ def draw_status():
         
         # Draw background for turn indicator
         if player == 'X':
-            indicator_color = X_SCORE_COLOR
+            indicator_color = animation.lerp_color(O_SCORE_COLOR, X_SCORE_COLOR, fade)
         else:
-            indicator_color = O_SCORE_COLOR
+            indicator_color = animation.lerp_color(X_SCORE_COLOR, O_SCORE_COLOR, fade)
             
         pygame.draw.rect(screen, indicator_color, 
                         (indicator_x, indicator_y, indicator_width, indicator_height), 
@@ -311,7 +397,7 @@ def draw_status():
         screen.blit(text_surface, text_surface.get_rect(center=(WIDTH // 2, HEIGHT - 50)))
         
         # Draw timer
-        remaining_time = max(0, turn_timer - (time.time() - timer_start))
+        remaining_time = max(0, turn_timer - (now - timer_start))
         timer_text = timer_font.render(f"Time: {int(remaining_time)}s", True, TIMER_COLOR)
         screen.blit(timer_text, (WIDTH // 2 - 40, HEIGHT - 30))
         
@@ -334,15 +420,25 @@ def draw_status():
 
 def restart():
     """Restart the game"""
-    global board, game_over, winner, player, timer_start
-    screen.fill(BG_COLOR)
-    draw_lines()
+    global board, game_over, winner, player, timer_start, winning_line, board_layer_dirty
     board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
     game_over = False
     winner = None
     player = 'X'
     timer_start = time.time()
-    animation_progress.clear()
+    winning_line = None
+    animations.clear()
+    board_layer_dirty = True
+    cancel_ai_search()
+    if publisher is not None:
+        publisher.snapshot(board, player, scores)
+
+def broadcast_result():
+    """Tell spectators how the game ended and the new score"""
+    if publisher is not None:
+        publisher.result(winner)
+        key = winner if winner else 'Draws'
+        publisher.score(key, scores[key])
 
 def check_button_hover(pos):
     """Check if mouse is hovering over restart button"""
@@ -375,183 +471,185 @@ def toggle_difficulty():
     if difficulty == 'Easy':
         difficulty = 'Medium'
     elif difficulty == 'Medium':
+        difficulty = 'Learned'
+    elif difficulty == 'Learned':
         difficulty = 'Hard'
+    elif difficulty == 'Hard':
+        difficulty = 'Expert'
+        get_search_pool()  # Start the workers in the background before the first move
     else:
         difficulty = 'Easy'
+    cancel_ai_search()
+
+def get_search_pool():
+    """Start the Expert AI worker pool once and keep it warm between moves
+
+    The workers start in the background, so check the pool is ready before
+    searching on it from the game loop.
+    """
+    global search_pool
+    if search_pool is None:
+        search_pool = parallel_search.SearchPool()
+    return search_pool
+
+def cancel_ai_search():
+    """Abandon the Expert AI search in progress, if any"""
+    global ai_search
+    if ai_search is not None:
+        ai_search.cancel()
+        ai_search = None
 
 def computer_move():
     """Make a move for the computer based on difficulty"""
-    if difficulty == 'Easy':
-        # Random move
-        available_moves = []
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if available_square(row, col):
-                    available_moves.append((row, col))
-        
-        if available_moves:
-            row, col = random.choice(available_moves)
-            return row, col
-    
-    elif difficulty == 'Medium':
-        # Try to win, then block, then random
-        # Check for winning move
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if available_square(row, col):
-                    board[row][col] = 'O'  # Try move
-                    if check_win() == 'O':
-                        board[row][col] = None  # Undo move
-                        return row, col
-                    board[row][col] = None  # Undo move
-        
-        # Check for blocking move
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if available_square(row, col):
-                    board[row][col] = 'X'  # Try opponent's move
-                    if check_win() == 'X':
-                        board[row][col] = None  # Undo move
-                        return row, col
-                    board[row][col] = None  # Undo move
-        
-        # Random move
-        available_moves = []
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if available_square(row, col):
-                    available_moves.append((row, col))
-        
-        if available_moves:
-            row, col = random.choice(available_moves)
-            return row, col
-    
-    else:  # Hard
-        # Try to win, block, take center, take corners, then edges
-        # Check for winning move
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if available_square(row, col):
-                    board[row][col] = 'O'  # Try move
-                    if check_win() == 'O':
-                        board[row][col] = None  # Undo move
-                        return row, col
-                    board[row][col] = None  # Undo move
-        
-        # Check for blocking move
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if available_square(row, col):
-                    board[row][col] = 'X'  # Try opponent's move
-                    if check_win() == 'X':
-                        board[row][col] = None  # Undo move
-                        return row, col
-                    board[row][col] = None  # Undo move
-        
-        # Take center
-        if available_square(1, 1):
-            return 1, 1
-        
-        # Take corners
-        corners = [(0, 0), (0, 2), (2, 0), (2, 2)]
-        random.shuffle(corners)
-        for row, col in corners:
-            if available_square(row, col):
-                return row, col
-        
-        # Take edges
-        edges = [(0, 1), (1, 0), (1, 2), (2, 1)]
-        random.shuffle(edges)
-        for row, col in edges:
-            if available_square(row, col):
-                return row, col
-    
-    return None, None  # Should never reach here unless board is full
-
-# Draw initial board
-draw_lines()
-draw_status_area()
-
-# Main game loop
-clock = pygame.time.Clock()
-while True:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-            
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            mouseX = event.pos[0]
-            mouseY = event.pos[1]
-            
-            # Handle game board clicks
-            if not game_over and mouseY < HEIGHT - 100:
-                clicked_row = mouseY // SQUARE_SIZE
-                clicked_col = mouseX // SQUARE_SIZE
-                
-                if clicked_row < BOARD_ROWS and clicked_col < BOARD_COLS:
-                    if available_square(clicked_row, clicked_col):
-                        mark_square(clicked_row, clicked_col, player)
-                        winner = check_win()
-                        if winner:
-                            game_over = True
-                            scores[winner] += 1
-                        elif is_board_full():
-                            game_over = True
-                            scores['Draws'] += 1
-                        else:
-                            player = 'O' if player == 'X' else 'X'
-                            timer_start = time.time()  # Reset timer for next player
-            
-            # Handle restart button click
-            if game_over and check_button_hover((mouseX, mouseY)):
-                restart()
-            
-            # Handle mode button click
-            if check_mode_button_hover((mouseX, mouseY)):
-                toggle_game_mode()
-            
-            # Handle difficulty button click
-            if check_difficulty_button_hover((mouseX, mouseY)):
-                toggle_difficulty()
-        
-        # Change button color on hover
-        if event.type == pygame.MOUSEMOTION:
-            if check_button_hover(event.pos) and game_over:
-                pygame.draw.rect(screen, BUTTON_HOVER_COLOR, 
-                                (WIDTH // 2 - 100, HEIGHT - 40, 200, 30), border_radius=10)
-                restart_text = small_font.render("Play Again", True, TEXT_COLOR)
-                screen.blit(restart_text, restart_text.get_rect(center=(WIDTH // 2, HEIGHT - 25)))
-    
-    # Computer's turn
-    if not game_over and player == 'O' and game_mode == 'PVC':
-        # Add a small delay to make it feel more natural
-        pygame.time.delay(500)
-        row, col = computer_move()
-        if row is not None and col is not None:
-            mark_square(row, col, 'O')
-            winner = check_win()
-            if winner:
-                game_over = True
-                scores[winner] += 1
-            elif is_board_full():
-                game_over = True
-                scores['Draws'] += 1
-            else:
-                player = 'X'
-                timer_start = time.time()  # Reset timer for next player
-    
-    # Check for timer expiration
-    if not game_over and time.time() - timer_start > turn_timer:
-        # Time's up, switch players
-        player = 'O' if player == 'X' else 'X'
-        timer_start = time.time()  # Reset timer
-    
-    # Redraw the screen
-    screen.fill(BG_COLOR, (0, 0, WIDTH, HEIGHT - 100))  # Clear game area but not status area
+    pool = get_search_pool() if difficulty == 'Expert' else None
+    return game_ai.computer_move(board, difficulty, 'O', learned_policy, pool, AI_TIME_BUDGET)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Enhanced Tic Tac Toe")
+    parser.add_argument('--profile', nargs='?', const=frame_profiler.DEFAULT_REPORT, metavar='REPORT',
+                        help="profile allocations and GC pauses, writing a report on exit")
+    parser.add_argument('--spectate', nargs='?', metavar='HOST:PORT',
+                        const=f"{spectator.DEFAULT_HOST}:{spectator.DEFAULT_PORT}",
+                        help="stream the games to a spectator hub")
+    args = parser.parse_args()
+    init()
+
+    # Optional allocation and GC profiling
+    profiler = None
+    if args.profile:
+        profiler = frame_profiler.FrameProfiler(args.profile)
+        profiler.start()
+
+    # Optional spectator stream
+    if args.spectate:
+        host, _, port = args.spectate.rpartition(':')
+        publisher = spectator.SpectatorPublisher(host or spectator.DEFAULT_HOST, int(port))
+        publisher.snapshot(board, player, scores)
+
+    # Set up the display
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('Enhanced Tic Tac Toe')
+    screen.fill(BG_COLOR)
+
+    # Draw initial board
     draw_lines()
-    draw_figures()
-    draw_status()
-    
-    pygame.display.update()
-    clock.tick(60)  # 60 FPS
+    draw_status_area()
+
+    # Main game loop
+    clock = pygame.time.Clock()
+    while True:
+        if profiler:
+            profiler.begin_frame()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                if profiler:
+                    profiler.stop()
+                if search_pool is not None:
+                    search_pool.close()
+                if publisher is not None:
+                    publisher.close()
+                pygame.quit()
+                sys.exit()
+
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                mouseX = event.pos[0]
+                mouseY = event.pos[1]
+
+                # Handle game board clicks (ignored while the Expert AI is thinking)
+                if not game_over and ai_search is None and mouseY < HEIGHT - 100:
+                    clicked_row = mouseY // SQUARE_SIZE
+                    clicked_col = mouseX // SQUARE_SIZE
+
+                    if clicked_row < BOARD_ROWS and clicked_col < BOARD_COLS:
+                        if available_square(clicked_row, clicked_col):
+                            mark_square(clicked_row, clicked_col, player)
+                            winner = check_win()
+                            if winner:
+                                game_over = True
+                                scores[winner] += 1
+                            elif is_board_full():
+                                game_over = True
+                                scores['Draws'] += 1
+                            if game_over:
+                                broadcast_result()
+                            else:
+                                player = 'O' if player == 'X' else 'X'
+                                timer_start = time.time()  # Reset timer for next player
+
+                # Handle restart button click
+                if game_over and check_button_hover((mouseX, mouseY)):
+                    restart()
+
+                # Handle mode button click
+                if check_mode_button_hover((mouseX, mouseY)):
+                    toggle_game_mode()
+
+                # Handle difficulty button click
+                if check_difficulty_button_hover((mouseX, mouseY)):
+                    toggle_difficulty()
+
+            # Change button color on hover
+            if event.type == pygame.MOUSEMOTION:
+                if check_button_hover(event.pos) and game_over:
+                    pygame.draw.rect(screen, BUTTON_HOVER_COLOR, 
+                                    (WIDTH // 2 - 100, HEIGHT - 40, 200, 30), border_radius=10)
+                    restart_text = small_font.render("Play Again", True, TEXT_COLOR)
+                    screen.blit(restart_text, restart_text.get_rect(center=(WIDTH // 2, HEIGHT - 25)))
+
+        # Computer's turn
+        if not game_over and player == 'O' and game_mode == 'PVC':
+            if difficulty == 'Expert':
+                # Poll the worker pool so the window stays responsive while it thinks
+                row, col = None, None
+                if ai_search is None:
+                    pool = get_search_pool()
+                    if pool.ready():
+                        ai_search = pool.start(board, 'O', AI_TIME_BUDGET)
+                elif ai_search.done() and time.time() - timer_start >= AI_MOVE_DELAY:
+                    row, col = ai_search.result()
+                    ai_search = None
+            else:
+                # Add a small delay to make it feel more natural
+                pygame.time.delay(int(AI_MOVE_DELAY * 1000))
+                row, col = computer_move()
+            if row is not None and col is not None:
+                mark_square(row, col, 'O')
+                winner = check_win()
+                if winner:
+                    game_over = True
+                    scores[winner] += 1
+                elif is_board_full():
+                    game_over = True
+                    scores['Draws'] += 1
+                if game_over:
+                    broadcast_result()
+                else:
+                    player = 'X'
+                    timer_start = time.time()  # Reset timer for next player
+
+        # Check for timer expiration
+        if not game_over and time.time() - timer_start > turn_timer:
+            # Time's up, switch players
+            cancel_ai_search()
+            player = 'O' if player == 'X' else 'X'
+            timer_start = time.time()  # Reset timer
+
+        # Send the turn timer to spectators once a second
+        if publisher is not None and not game_over:
+            tick = (player, max(0, int(turn_timer - (time.time() - timer_start))))
+            if tick != last_tick:
+                last_tick = tick
+                publisher.tick(*tick)
+
+        # Redraw the screen
+        now = time.time()
+        update_animations(now)
+        screen.blit(board_layer, (0, 0))  # Lines and settled pieces, cached
+        draw_figures(now)
+        draw_status(now)
+
+        pygame.display.update()
+        if profiler:
+            profiler.end_frame()
+        clock.tick(60)  # 60 FPS
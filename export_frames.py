@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Render recorded games to PNG frame sequences without opening a window.
+
+Reuses the game's own drawing code on an off-screen surface under the dummy
+SDL driver, driving its animations with a simulated clock so every frame
+between moves is interpolated. Games are spread across a process pool, and
+each worker keeps its surface for all the games it renders.
+
+The move log has one game per line: the squares played (0-8, row-major),
+separated by spaces or commas, X moving first. A square may carry its mark
+(e.g. "X4 O0 X8") for games where a turn was skipped. Lines starting with
+'#' are ignored.
+
+    python3 export_frames.py games.txt --out frames --fps 30 --workers 4
+"""
+import os
+
+# Must be set before pygame is imported by the game module
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# Leave SIGTERM alone so the pool can stop its workers
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+
+import argparse
+import multiprocessing
+import time
+
+import pygame
+
+import enhanced_tic_tac_toe as game
+import game_ai
+
+MOVE_INTERVAL = 0.8  # Simulated seconds between moves
+END_HOLD = 1.5  # Simulated seconds to keep rendering after the last move
+
+
+def parse_game(line):
+    """Parse a move log line into a list of (row, col, mark)"""
+    moves = []
+    mark = 'X'
+    for token in line.replace(',', ' ').split():
+        if token[0].upper() in ('X', 'O'):
+            mark, token = token[0].upper(), token[1:]
+        if not token.isdigit() or not 0 <= int(token) <= 8:
+            raise ValueError(f"bad square {token!r}")
+        row, col = divmod(int(token), 3)
+        moves.append((row, col, mark))
+        mark = 'O' if mark == 'X' else 'X'
+    return moves
+
+
+def check_game(moves):
+    """Return why a parsed game cannot be played, or None if every move is legal"""
+    board = [[None] * 3 for _ in range(3)]
+    for number, (row, col, mark) in enumerate(moves, 1):
+        if game_ai.find_winner(board) is not None or not game_ai.available_moves(board):
+            return f"move {number} played after the game ended"
+        if board[row][col] is not None:
+            return f"move {number} plays an occupied square"
+        board[row][col] = mark
+    return None
+
+
+def read_games(path):
+    """Read the games in a move log, returning (number, line) pairs"""
+    games = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                games.append((number, line))
+    return games
+
+
+def _init_worker():
+    """Set the game module up with an off-screen surface this worker reuses for every game"""
+    game.init()
+    game.screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+
+
+def render_game(number, line, out_dir, fps):
+    """Render one game to out_dir/game_NNNN, returning (number, frames, error)"""
+    try:
+        moves = parse_game(line)
+    except ValueError as error:
+        return number, 0, str(error)
+    # Check the whole game first so a bad line never leaves partial frames behind
+    error = check_game(moves)
+    if error:
+        return number, 0, error
+
+    game_dir = os.path.join(out_dir, f"game_{number:04d}")
+    os.makedirs(game_dir, exist_ok=True)
+
+    # Start from a fresh game at simulated time 0
+    game.restart()
+    game.scores = {'X': 0, 'O': 0, 'Draws': 0}
+    game.timer_start = 0.0
+    game.shown_status = None
+
+    end = (len(moves) + 1) * MOVE_INTERVAL + END_HOLD
+    frames = int(end * fps)
+    next_move = 0
+    for frame in range(frames):
+        now = frame / fps
+
+        # Play every move that is due by this frame
+        while next_move < len(moves) and (next_move + 1) * MOVE_INTERVAL <= now:
+            row, col, mark = moves[next_move]
+            next_move += 1
+            game.player = mark
+            move_time = next_move * MOVE_INTERVAL
+            game.mark_square(row, col, mark, move_time)
+            game.winner = game.check_win(move_time)
+            if game.winner:
+                game.game_over = True
+                game.scores[game.winner] += 1
+            elif all(square is not None for board_row in game.board for square in board_row):
+                game.game_over = True
+                game.scores['Draws'] += 1
+            else:
+                game.player = 'O' if mark == 'X' else 'X'
+                game.timer_start = move_time
+
+        # Same drawing steps as the game loop
+        game.update_animations(now)
+        game.screen.blit(game.board_layer, (0, 0))
+        game.draw_figures(now)
+        game.draw_status(now)
+        pygame.image.save(game.screen, os.path.join(game_dir, f"frame_{frame:05d}.png"))
+
+    return number, frames, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export recorded games as PNG frame sequences")
+    parser.add_argument('log', help="move log, one game per line")
+    parser.add_argument('--out', default='frames', help="output directory")
+    parser.add_argument('--fps', type=int, default=30, help="frames per simulated second")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes")
+    args = parser.parse_args()
+
+    games = read_games(args.log)
+    start = time.perf_counter()
+    total_frames = 0
+    # Spawn fresh workers rather than forking a process that has already started SDL
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers, _init_worker) as pool:
+        tasks = [(number, line, args.out, args.fps) for number, line in games]
+        for number, frames, error in pool.starmap(render_game, tasks, chunksize=1):
+            total_frames += frames
+            if error:
+                print(f"Line {number}: {error}")
+    elapsed = time.perf_counter() - start
+
+    print(f"Rendered {total_frames} frames from {len(games)} games in {elapsed:.2f}s "
+          f"({total_frames / elapsed:.1f} frames/s with {args.workers} workers)")
+
+
+if __name__ == '__main__':
+    main()
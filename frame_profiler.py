@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Opt-in allocation and garbage collection profiling for the main loop.
+
+Built on tracemalloc and gc.callbacks. Per frame it records the frame time,
+the transient allocation peak, the net change in traced memory and the time
+spent in garbage collection. Every sample_interval frames one frame is
+traced line by line through the program's own source files, charging each
+line with the memory it allocated while it ran, so short-lived objects like
+temporary Rects and rendered text show up by call site. Every few seconds
+it also snapshots live allocations to find the call sites that keep memory.
+stop() writes a plain-text report that ties GC pauses to slow frames and
+shows memory growth over the session.
+
+Memory the profiler allocates for its own records and snapshots is
+subtracted from every figure, and its own stacks are filtered out of the
+snapshots.
+"""
+import gc
+import linecache
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+
+DEFAULT_REPORT = 'profile_report.txt'
+WARMUP_FRAMES = 120  # Frames to skip before taking the growth baseline
+STACK_FRAMES = 32  # Frames kept per traceback, deep enough to reach the profiler under re's parser
+
+
+def _percentile(values, fraction):
+    """Return the value at fraction of the way through the sorted values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FrameProfiler:
+    """Collects per-frame allocation, GC and memory statistics"""
+
+    def __init__(self, report_path=DEFAULT_REPORT, frame_budget=1 / 60,
+                 snapshot_interval=300, sample_interval=60, top=15):
+        self.report_path = report_path
+        self.frame_budget = frame_budget
+        self.snapshot_interval = snapshot_interval
+        self.sample_interval = sample_interval
+        self.top = top
+
+        # Per-frame records live in flat arrays to keep the profiler's own allocations small
+        self.frame_times = array('d')
+        self.frame_peaks = array('d')
+        self.frame_net = array('d')
+        self.frame_gc = array('d')
+        self.memory_samples = []  # (seconds since start, traced bytes)
+
+        self.gc_stats = {}  # generation -> [collections, total seconds, max seconds, objects collected]
+        self.site_counts = {}  # (file, line) -> [blocks, bytes] allocated across snapshot windows
+        self.site_frames = 0
+        self.line_stats = {}  # (file, line) -> bytes allocated in sampled frames
+        self.sampled_frames = []  # Indices of the frames traced line by line
+        self.baseline = None
+        self.last_snapshot = None
+        self.session_start = None
+        self.frame_start = None
+        self.frame_memory = 0
+        self.frame_own = 0
+        self.frame_gc_time = 0.0
+        self.gc_start = None
+        self.last_sample = 0.0
+        self.own_memory = 0  # Traced bytes held by the profiler itself
+        self.end_memory = None  # Traced bytes when the last frame ended
+        # Line tracing readings (current, peak, after, line start), kept out of int objects
+        self.readings = array('q', bytes(32))
+
+        self.source_dir = None
+        self.sample_frame = None
+        self.sample_site = None
+        self.sample_peak = 0
+
+    def start(self):
+        """Start tracing allocations and timing garbage collections"""
+        main_file = getattr(sys.modules['__main__'], '__file__', None) or os.getcwd()
+        self.source_dir = os.path.dirname(os.path.abspath(main_file)) + os.sep
+        tracemalloc.start(STACK_FRAMES)
+        gc.callbacks.append(self._on_gc)
+        self.session_start = time.perf_counter()
+
+    def stop(self):
+        """Stop profiling and write the report"""
+        if self.sample_frame is not None:
+            self._read_memory()
+            self._stop_sampling()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        final = self._snapshot()
+        tracemalloc.stop()
+        self.write_report(final)
+        print(f"Profile report written to {self.report_path}")
+
+    def _on_gc(self, phase, info):
+        """Time each collection and charge it to the current frame"""
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+            return
+        if self.gc_start is None:
+            return
+        pause = time.perf_counter() - self.gc_start
+        self.gc_start = None
+        self.frame_gc_time += pause
+
+        stats = self.gc_stats.setdefault(info['generation'], [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += pause
+        stats[2] = max(stats[2], pause)
+        stats[3] += info['collected']
+
+    def _snapshot(self):
+        """Snapshot live allocations, ignoring any made from the profiler's own stacks"""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, __file__, all_frames=True),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+
+    def _is_source(self, filename):
+        """Check if filename is one of the program's own files"""
+        return filename.startswith(self.source_dir) and filename != __file__
+
+    def _read_memory(self):
+        """Read the traced memory into readings before the tracer allocates anything"""
+        self.readings[0], self.readings[1] = tracemalloc.get_traced_memory()
+
+    def _switch_line(self, site):
+        """Charge the memory read by _read_memory to the current line and move to site"""
+        readings = self.readings
+        if self.sample_site is not None:
+            self.line_stats[self.sample_site] = (self.line_stats.get(self.sample_site, 0)
+                                                 + readings[1] - readings[3])
+        self.sample_peak = max(self.sample_peak, readings[1])
+        self.sample_site = site
+
+        # Leave the bookkeeping above out of the next line's figures
+        readings[2] = tracemalloc.get_traced_memory()[0]
+        self.own_memory += readings[2] - readings[0]
+        tracemalloc.reset_peak()
+        readings[3] = readings[2]
+
+    def _trace_call(self, frame, event, arg):
+        """Follow the lines of calls into the program's own source files"""
+        self._read_memory()
+        # Tracing gave the call a frame object, which is not the program's allocation
+        self.readings[3] += sys.getsizeof(frame)
+        if not self._is_source(frame.f_code.co_filename):
+            self.own_memory += tracemalloc.get_traced_memory()[0] - self.readings[0]
+            return None
+        self._switch_line(None)
+        return self._trace_line
+
+    def _trace_line(self, frame, event, arg):
+        """Move the allocation count to each line as it runs"""
+        self._read_memory()
+        if event == 'line':
+            self._switch_line((frame.f_code.co_filename, frame.f_lineno))
+        elif event == 'return':
+            caller = frame.f_back
+            if caller is not None and self._is_source(caller.f_code.co_filename):
+                self._switch_line((caller.f_code.co_filename, caller.f_lineno))
+            else:
+                self._switch_line(None)
+        else:
+            self.own_memory += tracemalloc.get_traced_memory()[0] - self.readings[0]
+        return self._trace_line
+
+    def _start_sampling(self, frame):
+        """Trace the rest of this frame line by line"""
+        self.sample_frame = frame
+        self.sample_site = None
+        sys.settrace(self._trace_call)
+        frame.f_trace = self._trace_line
+
+        # Start the frame after the tracer's own setup
+        self.readings[2] = tracemalloc.get_traced_memory()[0]
+        self.own_memory += self.readings[2] - self.frame_memory
+        tracemalloc.reset_peak()
+        self.frame_memory = self.sample_peak = self.readings[3] = self.readings[2]
+
+    def _stop_sampling(self):
+        """Stop tracing lines and close the last one, already read by _read_memory"""
+        sys.settrace(None)
+        self.sample_frame.f_trace = None
+        self.sample_frame = None
+        self._switch_line(None)
+
+    def begin_frame(self):
+        """Mark the start of a frame"""
+        tracemalloc.reset_peak()
+        self.frame_memory = tracemalloc.get_traced_memory()[0]
+        if self.end_memory is not None:
+            # The profiler's records are made between frames
+            self.own_memory += self.frame_memory - self.end_memory
+        self.frame_gc_time = 0.0
+        self.frame_start = time.perf_counter()
+        if len(self.frame_times) >= WARMUP_FRAMES and len(self.frame_times) % self.sample_interval == 0:
+            self._start_sampling(sys._getframe(1))
+        self.frame_own = self.own_memory
+
+    def end_frame(self):
+        """Mark the end of a frame and record its statistics"""
+        sampled = self.sample_frame is not None
+        if sampled:
+            # Close the last line before the profiler allocates anything
+            self.readings[0], self.readings[1] = tracemalloc.get_traced_memory()
+            self._stop_sampling()
+        now = time.perf_counter()
+        current, peak = tracemalloc.get_traced_memory()
+        if sampled:
+            # Line tracing resets the peak, so use the highest one it saw
+            peak = max(peak, self.sample_peak)
+            self.sampled_frames.append(len(self.frame_times))
+        program = current - self.own_memory
+        self.frame_times.append(now - self.frame_start)
+        self.frame_peaks.append(peak - self.frame_memory)
+        self.frame_net.append(program - (self.frame_memory - self.frame_own))
+        self.frame_gc.append(self.frame_gc_time)
+
+        if now - self.last_sample >= 1.0:
+            self.last_sample = now
+            self.memory_samples.append((now - self.session_start, program))
+
+        frames = len(self.frame_times)
+        if frames == WARMUP_FRAMES:
+            self.baseline = self.last_snapshot = self._snapshot()
+        elif self.last_snapshot is not None and frames % self.snapshot_interval == 0:
+            self._record_sites(self._snapshot(), self.snapshot_interval)
+        self.end_memory = current
+
+    def _record_sites(self, snapshot, frames):
+        """Add the allocations made since the last snapshot to the call-site totals"""
+        for stat in snapshot.compare_to(self.last_snapshot, 'lineno'):
+            if stat.count_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            counts = self.site_counts.setdefault((frame.filename, frame.lineno), [0, 0])
+            counts[0] += stat.count_diff
+            counts[1] += stat.size_diff
+        self.site_frames += frames
+        self.last_snapshot = snapshot
+
+    def _growth_rate(self):
+        """Least-squares slope of traced memory in bytes per minute"""
+        samples = self.memory_samples[len(self.memory_samples) // 10:]  # Skip start-up
+        if len(samples) < 2:
+            return 0.0
+        mean_t = sum(t for t, _ in samples) / len(samples)
+        mean_m = sum(m for _, m in samples) / len(samples)
+        spread = sum((t - mean_t) ** 2 for t, _ in samples)
+        if spread == 0:
+            return 0.0
+        return sum((t - mean_t) * (m - mean_m) for t, m in samples) / spread * 60
+
+    def write_report(self, final):
+        """Write the profiling report to report_path"""
+        frames = len(self.frame_times)
+        elapsed = time.perf_counter() - self.session_start
+        # Frames traced line by line run far slower, so they are left out of the timings
+        sampled = set(self.sampled_frames)
+        timed = [i for i in range(frames) if i not in sampled]
+        times_ms = [self.frame_times[i] * 1000 for i in timed]
+        slow = [i for i in timed if self.frame_times[i] > self.frame_budget]
+        slow_with_gc = [i for i in slow if self.frame_gc[i] > 0]
+        slow_time = sum(self.frame_times[i] for i in slow)
+        slow_gc_time = sum(self.frame_gc[i] for i in slow)
+
+        lines = [
+            "Enhanced Tic Tac Toe - allocation and GC profile",
+            f"Session: {elapsed:.1f}s, {frames} frames",
+            f"(timings include tracemalloc overhead and leave out the {len(sampled)} sampled frames)",
+            "",
+            "Frame time",
+            f"  mean {sum(times_ms) / max(1, len(timed)):.2f} ms, p95 {_percentile(times_ms, 0.95):.2f} ms, "
+            f"max {max(times_ms, default=0):.2f} ms",
+            f"  slow frames (> {self.frame_budget * 1000:.1f} ms): {len(slow)}",
+            "",
+            "Allocations per frame",
+            f"  transient peak: mean {sum(self.frame_peaks) / max(1, frames) / 1024:.1f} KiB, "
+            f"p95 {_percentile(self.frame_peaks, 0.95) / 1024:.1f} KiB, "
+            f"max {max(self.frame_peaks, default=0) / 1024:.1f} KiB",
+            f"  net change: mean {sum(self.frame_net) / max(1, frames):+.1f} bytes",
+            "",
+            "Garbage collection",
+        ]
+        for generation in sorted(self.gc_stats):
+            count, total, longest, collected = self.gc_stats[generation]
+            lines.append(f"  gen {generation}: {count} collections, total {total * 1000:.1f} ms, "
+                         f"mean {total / count * 1000:.3f} ms, max {longest * 1000:.3f} ms, "
+                         f"{collected} objects collected")
+        if not self.gc_stats:
+            lines.append("  no collections")
+        lines.append(f"  slow frames with a GC pause: {len(slow_with_gc)} of {len(slow)}")
+        if slow_time:
+            lines.append(f"  share of slow-frame time spent in GC: {slow_gc_time / slow_time:.1%}")
+
+        lines += ["", "Slowest frames"]
+        for i in sorted(timed, key=lambda i: self.frame_times[i], reverse=True)[:self.top]:
+            lines.append(f"  frame {i:7d}: {self.frame_times[i] * 1000:7.2f} ms, "
+                         f"GC {self.frame_gc[i] * 1000:6.2f} ms, "
+                         f"peak {self.frame_peaks[i] / 1024:7.1f} KiB")
+
+        lines += ["", "Memory growth (excluding the profiler's own)"]
+        if self.memory_samples:
+            lines.append(f"  traced memory: {self.memory_samples[0][1] / 1024:.1f} KiB at start, "
+                         f"{self.memory_samples[-1][1] / 1024:.1f} KiB at end")
+        lines.append(f"  steady-state trend: {self._growth_rate() / 1024:+.2f} KiB/min")
+
+        if sampled:
+            lines += ["", f"Allocations per frame by call site (traced over {len(sampled)} sampled frames)"]
+            ranked = sorted(self.line_stats.items(), key=lambda item: item[1], reverse=True)
+            for (filename, lineno), allocated in ranked[:self.top]:
+                if allocated <= 0:
+                    break
+                source = linecache.getline(filename, lineno).strip()[:60]
+                lines.append(f"  {os.path.basename(filename)}:{lineno}: "
+                             f"{allocated / len(sampled):8.1f} bytes  {source}")
+
+        if self.site_frames:
+            lines += ["", f"Allocations outliving their frame, per frame by call site "
+                          f"(over {self.site_frames} frames)"]
+            ranked = sorted(self.site_counts.items(), key=lambda item: item[1][0], reverse=True)
+            for (filename, lineno), (blocks, size) in ranked[:self.top]:
+                lines.append(f"  {os.path.basename(filename)}:{lineno}: "
+                             f"{blocks / self.site_frames:.3f} blocks, {size / self.site_frames:.1f} bytes")
+
+        if self.baseline is not None:
+            lines += ["", "Largest growth since warm-up by call site"]
+            for stat in final.compare_to(self.baseline, 'lineno')[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {os.path.basename(frame.filename)}:{frame.lineno}: "
+                             f"{stat.size_diff / 1024:+.1f} KiB, {stat.count_diff:+d} blocks")
+
+        with open(self.report_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Computer opponent logic, independent of pygame and the game's globals.
+
+Every function takes the board to play on, a 2D list of None, 'X' and 'O',
+so the AI can be queried outside the game loop (see batch_query.py).
+"""
+import functools
+import random
+
+import policy_table
+
+BOARD_SIZE = 3
+DIFFICULTIES = ('Easy', 'Medium', 'Learned', 'Hard', 'Expert')
+CORNERS = [(0, 0), (0, 2), (2, 0), (2, 2)]
+EDGES = [(0, 1), (1, 0), (1, 2), (2, 1)]
+LINES = [
+    [(0, 0), (0, 1), (0, 2)], [(1, 0), (1, 1), (1, 2)], [(2, 0), (2, 1), (2, 2)],  # rows
+    [(0, 0), (1, 0), (2, 0)], [(0, 1), (1, 1), (2, 1)], [(0, 2), (1, 2), (2, 2)],  # columns
+    [(0, 0), (1, 1), (2, 2)], [(0, 2), (1, 1), (2, 0)],                            # diagonals
+]
+
+
+def opponent_of(player):
+    """Return the other player's mark"""
+    return 'X' if player == 'O' else 'O'
+
+
+def find_winner(board):
+    """Return the mark with three in a row, or None"""
+    for line in LINES:
+        (r1, c1), (r2, c2), (r3, c3) = line
+        if board[r1][c1] is not None and board[r1][c1] == board[r2][c2] == board[r3][c3]:
+            return board[r1][c1]
+    return None
+
+
+def available_moves(board):
+    """List the empty squares in row-major order"""
+    return [(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)
+            if board[row][col] is None]
+
+
+def winning_move(board, mark):
+    """Return the first empty square that completes a line for mark, or None"""
+    for row, col in available_moves(board):
+        board[row][col] = mark  # Try move
+        won = find_winner(board) == mark
+        board[row][col] = None  # Undo move
+        if won:
+            return row, col
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _solve(cells, player):
+    """Return (score, best cells) for player to move on a flat board"""
+    opponent = opponent_of(player)
+    best_score, best_cells = None, []
+    for cell, mark in enumerate(cells):
+        if mark is not None:
+            continue
+        after = cells[:cell] + (player,) + cells[cell + 1:]
+        board = [after[row * BOARD_SIZE:(row + 1) * BOARD_SIZE] for row in range(BOARD_SIZE)]
+        if find_winner(board) == player:
+            score = 10
+        elif None not in after:
+            score = 0
+        else:
+            # Wins further away are worth less, so prefer the quickest one
+            score = -_solve(after, opponent)[0]
+            score -= (score > 0) - (score < 0)
+        if best_score is None or score > best_score:
+            best_score, best_cells = score, [cell]
+        elif score == best_score:
+            best_cells.append(cell)
+    return best_score or 0, tuple(best_cells)
+
+
+def evaluate(board, player):
+    """Return the game-theoretic value for player to move: 1 win, 0 draw, -1 loss"""
+    winner = find_winner(board)
+    if winner is not None:
+        return 1 if winner == player else -1
+    score, _ = _solve(tuple(mark for row in board for mark in row), player)
+    return (score > 0) - (score < 0)
+
+
+def candidate_moves(board, difficulty, player='O', policy=None):
+    """Return the equally preferred moves for difficulty; the AI picks one at random"""
+    if find_winner(board) is not None:
+        return []
+    moves = available_moves(board)
+    if not moves:
+        return []
+
+    if difficulty == 'Easy':
+        # Random move
+        return moves
+
+    if difficulty == 'Learned' and policy is not None:
+        # Constant-time lookup in the self-play policy table
+        row, col = policy_table.policy_move(policy, board, player)
+        if row is not None and col is not None:
+            return [(row, col)]
+
+    if difficulty == 'Expert':
+        # Perfect play from the solved game
+        _, cells = _solve(tuple(mark for row in board for mark in row), player)
+        return [divmod(cell, BOARD_SIZE) for cell in cells]
+
+    # Try to win, then block
+    for mark in (player, opponent_of(player)):
+        move = winning_move(board, mark)
+        if move is not None:
+            return [move]
+
+    if difficulty == 'Medium':
+        # Random move
+        return moves
+
+    # Hard (also the Learned fallback): take center, then corners, then edges
+    if board[1][1] is None:
+        return [(1, 1)]
+    for group in (CORNERS, EDGES):
+        free = [(row, col) for row, col in group if board[row][col] is None]
+        if free:
+            return free
+    return moves
+
+
+def computer_move(board, difficulty, player='O', policy=None, search_pool=None, budget=None):
+    """Choose a move for player, returning (row, col) or (None, None) if there is none"""
+    if difficulty == 'Expert' and search_pool is not None:
+        # Root-parallel search across all cores
+        return search_pool.best_move(board, player, budget)
+
+    moves = candidate_moves(board, difficulty, player, policy)
+    if not moves:
+        return None, None
+    return random.choice(moves)
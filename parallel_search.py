@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Root-parallel negamax search for the 'Expert' AI difficulty.
+
+Each candidate move at the root is searched as its own task on a process
+pool, so one AI decision can use every core. The pool is started once and
+kept warm between moves. The workers start on a background thread, and both
+the pool and Search objects can be polled from the game loop without
+blocking it.
+
+With a time budget the search deepens one ply at a time across every root
+move, and only moves searched to the same depth are compared. Workers stop
+a safety margin before the deadline so the last finished depth can be
+merged in time, and a shared generation counter lets an abandoned search
+stop its workers straight away.
+
+Run as a script to benchmark speedup and efficiency across worker counts:
+
+    python3 parallel_search.py --size 4 --depth 5 --workers 1 2 4 8
+    python3 parallel_search.py --size 5 --budget 1 --workers 1 4
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+WIN_SCORE = 1000
+NODE_CHECK_INTERVAL = 1024  # Nodes searched between deadline and cancel checks
+SAFETY_MARGIN = 0.15  # Seconds workers stop before the deadline to leave time for the merge
+
+_generation = None  # Shared counter of the pool's current search, set in each worker
+
+
+class SearchTimeout(Exception):
+    """Raised inside a worker when the time budget runs out or the search is cancelled"""
+
+
+def _init_worker(generation):
+    """Keep the pool's generation counter so workers can see cancelled searches"""
+    global _generation
+    _generation = generation
+
+
+@functools.lru_cache(maxsize=None)
+def winning_lines(size, length):
+    """Return all winning lines and the lines passing through each cell"""
+    lines = []
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + d_row * (length - 1)
+                end_col = col + d_col * (length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    lines.append(tuple((row + d_row * i) * size + col + d_col * i
+                                       for i in range(length)))
+
+    by_cell = [[] for _ in range(size * size)]
+    for line in lines:
+        for cell in line:
+            by_cell[cell].append(line)
+    return tuple(lines), tuple(tuple(cell_lines) for cell_lines in by_cell)
+
+
+class Searcher:
+    """Depth-limited alpha-beta negamax over a flat board"""
+
+    def __init__(self, cells, size, length, deadline, generation=None):
+        self.cells = list(cells)
+        self.lines, self.lines_by_cell = winning_lines(size, length)
+        self.deadline = deadline
+        self.generation = generation
+        self.nodes = 0
+
+    def expired(self):
+        """Check if the time budget is spent or the search has been cancelled"""
+        if time.time() > self.deadline:
+            return True
+        return (self.generation is not None and _generation is not None
+                and _generation.value != self.generation)
+
+    def wins(self, move, player):
+        """Check if the mark just placed at move completes a line"""
+        cells = self.cells
+        for line in self.lines_by_cell[move]:
+            if all(cells[cell] == player for cell in line):
+                return True
+        return False
+
+    def evaluate(self, player, opponent):
+        """Score a non-terminal position by the open lines each side holds"""
+        score = 0
+        for line in self.lines:
+            own = opp = 0
+            for cell in line:
+                mark = self.cells[cell]
+                if mark == player:
+                    own += 1
+                elif mark == opponent:
+                    opp += 1
+            if opp == 0:
+                score += own * own
+            elif own == 0:
+                score -= opp * opp
+        return score
+
+    def negamax(self, player, opponent, depth, alpha, beta, ply):
+        """Return the value of the position for player, searching depth plies"""
+        self.nodes += 1
+        if self.nodes % NODE_CHECK_INTERVAL == 0 and self.expired():
+            raise SearchTimeout()
+
+        cells = self.cells
+        moves = [i for i, mark in enumerate(cells) if mark is None]
+        if not moves:
+            return 0
+        if depth == 0:
+            return self.evaluate(player, opponent)
+
+        best = -WIN_SCORE
+        for move in moves:
+            cells[move] = player
+            if self.wins(move, player):
+                score = WIN_SCORE - ply
+            else:
+                score = -self.negamax(opponent, player, depth - 1, -beta, -alpha, ply + 1)
+            cells[move] = None
+
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+        return best
+
+
+def search_root_move(cells, size, length, player, move, depth, deadline, generation=None):
+    """Search one root move to depth plies, returning (move, score, exact, nodes)
+
+    The score is None if the search ran out of time or was cancelled, and
+    exact is True when the search reached the end of the game.
+    """
+    opponent = 'X' if player == 'O' else 'O'
+    searcher = Searcher(cells, size, length, deadline, generation)
+    if searcher.expired():
+        return move, None, False, 0
+    searcher.cells[move] = player
+    if searcher.wins(move, player):
+        return move, WIN_SCORE - 1, True, 1
+
+    remaining = searcher.cells.count(None)
+    try:
+        score = -searcher.negamax(opponent, player, depth - 1, -WIN_SCORE, WIN_SCORE, 2)
+    except SearchTimeout:
+        return move, None, False, searcher.nodes
+    return move, score, depth > remaining, searcher.nodes
+
+
+def _warm_up():
+    """Give a freshly started worker something to do"""
+    return os.getpid()
+
+
+def flatten_board(board):
+    """Turn a 2D board into a flat tuple of cells"""
+    return tuple(mark for row in board for mark in row)
+
+
+class Search:
+    """A root-parallel search in progress on a SearchPool"""
+
+    def __init__(self, executor, counter, cells, size, length, player, max_depth, deadline):
+        self.executor = executor
+        self.counter = counter
+        self.cells = cells
+        self.size = size
+        self.length = length
+        self.player = player
+        self.max_depth = max_depth
+        self.deadline = deadline
+        with counter.get_lock():
+            counter.value += 1
+            self.generation = counter.value
+
+        if deadline == float('inf'):
+            self.worker_deadline = deadline
+        else:
+            budget = max(0, deadline - time.time())
+            self.worker_deadline = deadline - min(SAFETY_MARGIN, budget / 4)
+
+        self.scores = {}  # move -> score at self.depth
+        self.exact = set()  # Moves whose score is final
+        self.depth = 0  # Deepest search finished for every root move
+        self.nodes = 0
+        self.finished = False
+        self.futures = []
+        # Without a deadline there is nothing to gain from deepening step by step
+        self._start_round(1 if deadline != float('inf') else max_depth)
+
+    def _start_round(self, depth):
+        """Search every root move that is not settled yet to depth plies"""
+        self.round_depth = depth
+        self.futures = [
+            self.executor.submit(search_root_move, self.cells, self.size, self.length, self.player,
+                                 move, depth, self.worker_deadline, self.generation)
+            for move, mark in enumerate(self.cells) if mark is None and move not in self.exact
+        ]
+
+    def _collect(self):
+        """Merge a finished round and start the next one if there is time"""
+        results = [future.result() for future in self.futures if not future.cancelled()]
+        self.nodes += sum(nodes for _, _, _, nodes in results)
+        if len(results) < len(self.futures) or any(score is None for _, score, _, _ in results):
+            # A root move ran out of time, so this depth cannot be compared
+            self.finished = True
+            return
+
+        for move, score, exact, _ in results:
+            self.scores[move] = score
+            if exact:
+                self.exact.add(move)
+        self.depth = self.round_depth
+        free = sum(1 for mark in self.cells if mark is None)
+        if (self.depth >= self.max_depth or len(self.exact) == free
+                or time.time() >= self.worker_deadline):
+            self.finished = True
+        else:
+            self._start_round(self.depth + 1)
+
+    def _advance(self):
+        """Merge the current round if all its root moves are done"""
+        if not self.finished and all(future.done() for future in self.futures):
+            self._collect()
+
+    def done(self):
+        """Check if the search is finished or the time budget is spent"""
+        self._advance()
+        return self.finished or time.time() >= self.deadline
+
+    def result(self):
+        """Wait for the search to finish and return the best (row, col)"""
+        while not self.finished:
+            timeout = None if self.deadline == float('inf') else self.deadline - time.time()
+            if timeout is not None and timeout <= 0:
+                break
+            if wait(self.futures, timeout=timeout).not_done:
+                break  # Out of time, keep the last depth every move finished
+            self._collect()
+        self.cancel()
+
+        best_score, best_moves = None, []
+        for move, score in self.scores.items():
+            if best_score is None or score > best_score:
+                best_score, best_moves = score, [move]
+            elif score == best_score:
+                best_moves.append(move)
+
+        if not best_moves:
+            # Not even one ply finished in time, fall back to any free cell
+            best_moves = [i for i, mark in enumerate(self.cells) if mark is None]
+        if not best_moves:
+            return None, None
+        return divmod(random.choice(best_moves), self.size)
+
+    def cancel(self):
+        """Stop the workers still searching for this search"""
+        self.finished = True
+        with self.counter.get_lock():
+            if self.counter.value == self.generation:
+                self.counter.value += 1
+        for future in self.futures:
+            future.cancel()
+
+
+class SearchPool:
+    """A warm process pool that searches root moves in parallel"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        # Workers must not inherit the pygame window, so never fork the game
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.generation = self.context.Value('i', 0)
+        self.executor = None
+
+        # Start every worker in the background so no move pays the process start-up
+        # cost and the caller never waits for the workers to import their modules
+        self.started = threading.Event()
+        self.starter = threading.Thread(target=self._start_workers, name='search-pool-start',
+                                        daemon=True)
+        self.starter.start()
+
+    def _start_workers(self):
+        """Create the worker processes and wait until each one is running"""
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.context,
+                                                initializer=_init_worker,
+                                                initargs=(self.generation,))
+            wait([self.executor.submit(_warm_up) for _ in range(self.workers)])
+        finally:
+            self.started.set()
+
+    def ready(self):
+        """Check if the workers have started, without waiting for them"""
+        return self.started.is_set()
+
+    def wait_ready(self):
+        """Block until the workers have started"""
+        self.started.wait()
+
+    def start(self, board, player, budget=None, max_depth=None, length=None):
+        """Start searching board for player and return a pollable Search
+
+        Starting a search cancels any search still running on the pool, and
+        waits for the workers if they have not started yet.
+        """
+        self.wait_ready()
+        size = len(board)
+        cells = flatten_board(board)
+        length = length or size
+        max_depth = max_depth or len(cells)
+        deadline = float('inf') if budget is None else time.time() + budget
+        return Search(self.executor, self.generation, cells, size, length, player,
+                      max_depth, deadline)
+
+    def best_move(self, board, player, budget=None, max_depth=None, length=None):
+        """Search board for player and block until the best (row, col) is known"""
+        return self.start(board, player, budget, max_depth, length).result()
+
+    def close(self):
+        """Stop any running search and shut the worker processes down"""
+        self.wait_ready()
+        with self.generation.get_lock():
+            self.generation.value += 1
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def benchmark(args):
+    """Time the same search at each worker count and report speedup and efficiency"""
+    board = [[None] * args.size for _ in range(args.size)]
+    for cell, mark in zip(args.opening, 'XOXOXOXOX'):
+        board[cell // args.size][cell % args.size] = mark
+    player = 'X' if len(args.opening) % 2 == 0 else 'O'
+
+    limit = f"{args.budget}s budget" if args.budget else f"depth {args.depth}"
+    print(f"Board {args.size}x{args.size}, {args.length} in a row, {limit}, "
+          f"{args.repeats} repeats")
+    print("workers   time (s)   depth   speedup   efficiency   nodes/s")
+    # Speedups are always relative to a real single-worker run
+    counts = [1] + [workers for workers in args.workers if workers != 1]
+    baseline = None
+    for workers in counts:
+        pool = SearchPool(workers)
+        pool.wait_ready()
+        try:
+            elapsed, nodes, depth = [], 0, None
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                search = pool.start(board, player, args.budget,
+                                    max_depth=None if args.budget else args.depth,
+                                    length=args.length)
+                search.result()
+                elapsed.append(time.perf_counter() - start)
+                nodes += search.nodes
+                depth = search.depth if depth is None else min(depth, search.depth)
+        finally:
+            pool.close()
+
+        best = min(elapsed)
+        rate = nodes / sum(elapsed)
+        # A fixed depth compares times, a fixed budget compares how much was searched
+        score = rate if args.budget else 1 / best
+        if baseline is None:
+            baseline = score
+        speedup = score / baseline
+        print(f"{workers:7d}   {best:8.3f}   {depth:5d}   {speedup:7.2f}   "
+              f"{speedup / workers:10.2f}   {rate:7.0f}")
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark the root-parallel AI search")
+    parser.add_argument('--size', type=int, default=4, help="board size")
+    parser.add_argument('--length', type=int, default=None, help="marks in a row to win (default: size)")
+    parser.add_argument('--depth', type=int, default=5, help="search depth in plies")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="search with a time budget in seconds instead of a fixed depth")
+    parser.add_argument('--opening', type=int, nargs='*', default=[],
+                        help="cells already played, alternating X and O")
+    parser.add_argument('--repeats', type=int, default=3, help="searches per worker count")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, cores}), help="worker counts to compare")
+    args = parser.parse_args()
+    args.length = args.length or args.size
+    benchmark(args)
+
+
+if __name__ == '__main__':
+    main()
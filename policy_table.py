@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Lookup of the learned policy table used by the 'Learned' AI difficulty.
+
+The table is a flat byte string with one entry per 3x3 position. Positions
+are encoded from the point of view of the player to move (0 = empty,
+1 = own mark, 2 = opponent mark) as a base-3 number, and only the
+canonical member of each symmetry class holds a move (0-8); every other
+entry is NO_MOVE.
+"""
+import os
+
+BOARD_SIZE = 3
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+NUM_POSITIONS = 3 ** NUM_CELLS
+NO_MOVE = 255
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policy.bin')
+
+
+def _rotate(perm):
+    """Rotate a cell permutation by 90 degrees clockwise"""
+    return tuple(perm[(BOARD_SIZE - 1 - col) * BOARD_SIZE + row]
+                 for row in range(BOARD_SIZE) for col in range(BOARD_SIZE))
+
+
+def _mirror(perm):
+    """Mirror a cell permutation left to right"""
+    return tuple(perm[row * BOARD_SIZE + (BOARD_SIZE - 1 - col)]
+                 for row in range(BOARD_SIZE) for col in range(BOARD_SIZE))
+
+
+def _build_symmetries():
+    """Build the 8 rotations and reflections of the board"""
+    symmetries = []
+    perm = tuple(range(NUM_CELLS))
+    for _ in range(4):
+        symmetries.append(perm)
+        symmetries.append(_mirror(perm))
+        perm = _rotate(perm)
+    return symmetries
+
+
+# Transformed cell i holds original cell SYMMETRIES[k][i]
+SYMMETRIES = _build_symmetries()
+
+
+def board_cells(board, player):
+    """Flatten a 2D board into cells seen from the given player's side"""
+    cells = []
+    for row in board:
+        for mark in row:
+            if mark is None:
+                cells.append(0)
+            elif mark == player:
+                cells.append(1)
+            else:
+                cells.append(2)
+    return cells
+
+
+def encode(cells):
+    """Encode flattened cells as a base-3 position index"""
+    index = 0
+    for value in reversed(cells):
+        index = index * 3 + value
+    return index
+
+
+def canonical(cells):
+    """Return (index, symmetry) of the smallest equivalent position"""
+    best_index, best_perm = None, None
+    for perm in SYMMETRIES:
+        index = encode([cells[i] for i in perm])
+        if best_index is None or index < best_index:
+            best_index, best_perm = index, perm
+    return best_index, best_perm
+
+
+def load_policy(path=POLICY_FILE):
+    """Load a policy table, returning None if it is missing or malformed"""
+    try:
+        with open(path, 'rb') as f:
+            table = f.read()
+    except OSError:
+        return None
+    if len(table) != NUM_POSITIONS:
+        return None
+    return table
+
+
+def policy_move(table, board, player):
+    """Look up the learned move for player, or (None, None) if there is none"""
+    cells = board_cells(board, player)
+    index, perm = canonical(cells)
+    move = table[index]
+    if move == NO_MOVE:
+        return None, None
+
+    cell = perm[move]
+    if cells[cell] != 0:
+        return None, None
+    return divmod(cell, BOARD_SIZE)
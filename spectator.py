@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""Live spectator stream for tournament games.
+
+Games are published as a compact binary event stream. Every record is one
+type byte, the milliseconds since the previous record as a varint, and a
+small payload:
+
+    MOVE      1 byte: square (0-8), plus 0x10 when the mark is O
+    RESULT    1 byte: 0 draw, 1 X won, 2 O won
+    TICK      1 byte: seconds left, plus 0x80 when it is O's turn
+    SCORE     1 byte counter (0 X, 1 O, 2 draws), varint new value
+    SNAPSHOT  2 byte base-3 board, 1 byte player, 3 varint scores
+
+The game sends records through a SpectatorPublisher, which never blocks the
+game loop, to a SpectatorHub that fans them out to every subscriber on a
+loopback TCP port. New subscribers first get the current game from the
+last snapshot onwards.
+
+    python3 spectator.py hub                  # run the fan-out hub
+    python3 enhanced_tic_tac_toe.py --spectate
+    python3 spectator.py watch                # print the live events
+    python3 spectator.py bench --subscribers 10 100 1000
+"""
+import argparse
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7007
+ROLE_PUBLISHER = b'P'
+ROLE_SUBSCRIBER = b'S'
+MAX_SUBSCRIBER_BUFFER = 1 << 20  # Bytes queued for a subscriber before it is dropped
+
+MOVE, RESULT, TICK, SCORE, SNAPSHOT = range(1, 6)
+SCORE_KEYS = ('X', 'O', 'Draws')
+WINNER_CODES = {None: 0, 'X': 1, 'O': 2}
+WINNERS = (None, 'X', 'O')
+
+
+def encode_varint(value):
+    """Encode a non-negative integer in as few 7-bit groups as it needs"""
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data, pos):
+    """Decode a varint at pos, returning (value, next pos) or None if it is incomplete"""
+    value = shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    return None
+
+
+class EventEncoder:
+    """Encodes game events and keeps the state needed for a snapshot"""
+
+    def __init__(self):
+        self.last_time = None
+        self.board = [None] * 9
+        self.player = 'X'
+        self.scores = {key: 0 for key in SCORE_KEYS}
+
+    def _header(self, kind, now):
+        """Encode the record type and the time since the previous record"""
+        now_ms = int(now * 1000)
+        delta = 0 if self.last_time is None else max(0, now_ms - self.last_time)
+        self.last_time = now_ms
+        return bytes((kind,)) + encode_varint(delta)
+
+    def move(self, row, col, mark, now):
+        """Encode a mark placed on the board"""
+        cell = row * 3 + col
+        self.board[cell] = mark
+        self.player = 'O' if mark == 'X' else 'X'
+        return self._header(MOVE, now) + bytes((cell | (0x10 if mark == 'O' else 0),))
+
+    def result(self, winner, now):
+        """Encode the end of a game, winner None for a draw"""
+        return self._header(RESULT, now) + bytes((WINNER_CODES[winner],))
+
+    def tick(self, player, seconds, now):
+        """Encode the turn timer for player"""
+        self.player = player
+        return self._header(TICK, now) + bytes((min(seconds, 0x7F) | (0x80 if player == 'O' else 0),))
+
+    def score(self, key, value, now):
+        """Encode a changed score counter"""
+        self.scores[key] = value
+        return self._header(SCORE, now) + bytes((SCORE_KEYS.index(key),)) + encode_varint(value)
+
+    def snapshot(self, now, board=None, player=None, scores=None):
+        """Encode the full game state, updating it from the arguments given"""
+        if board is not None:
+            self.board = [mark for row in board for mark in row]
+        if player is not None:
+            self.player = player
+        if scores is not None:
+            self.scores = {key: scores[key] for key in SCORE_KEYS}
+
+        index = 0
+        for mark in reversed(self.board):
+            index = index * 3 + WINNER_CODES[mark]
+        return (self._header(SNAPSHOT, now) + index.to_bytes(2, 'little')
+                + bytes((WINNER_CODES[self.player],))
+                + b''.join(encode_varint(self.scores[key]) for key in SCORE_KEYS))
+
+
+def _lookup(table, value, what):
+    """Look up a coded payload value, rejecting codes the format does not define"""
+    if value >= len(table):
+        raise ValueError(f"Bad spectator {what} code {value}")
+    return table[value]
+
+
+def decode_record(data, pos):
+    """Decode one record at pos, returning (event, next pos) or None if it is incomplete
+
+    Raises ValueError if the record is malformed.
+    """
+    if pos >= len(data):
+        return None
+    kind = data[pos]
+    header = decode_varint(data, pos + 1)
+    if header is None:
+        return None
+    delta, pos = header
+
+    if kind in (MOVE, RESULT, TICK):
+        if pos >= len(data):
+            return None
+        value = data[pos]
+        pos += 1
+        if kind == MOVE:
+            if value & 0x0F > 8 or value & ~0x1F:
+                raise ValueError(f"Bad spectator move {value}")
+            row, col = divmod(value & 0x0F, 3)
+            return ('move', delta, row, col, 'O' if value & 0x10 else 'X'), pos
+        if kind == RESULT:
+            return ('result', delta, _lookup(WINNERS, value, 'result')), pos
+        return ('tick', delta, 'O' if value & 0x80 else 'X', value & 0x7F), pos
+
+    if kind == SCORE:
+        if pos >= len(data):
+            return None
+        key = _lookup(SCORE_KEYS, data[pos], 'score')
+        value = decode_varint(data, pos + 1)
+        if value is None:
+            return None
+        return ('score', delta, key, value[0]), value[1]
+
+    if kind == SNAPSHOT:
+        if pos + 3 > len(data):
+            return None
+        index = int.from_bytes(data[pos:pos + 2], 'little')
+        if index >= 3 ** 9:
+            raise ValueError(f"Bad spectator board {index}")
+        player = _lookup(WINNERS, data[pos + 2], 'player')
+        pos += 3
+        scores = {}
+        for key in SCORE_KEYS:
+            value = decode_varint(data, pos)
+            if value is None:
+                return None
+            scores[key], pos = value
+        cells = []
+        for _ in range(9):
+            index, digit = divmod(index, 3)
+            cells.append(WINNERS[digit])
+        board = [cells[row * 3:row * 3 + 3] for row in range(3)]
+        return ('snapshot', delta, board, player, scores), pos
+
+    raise ValueError(f"Unknown spectator record type {kind}")
+
+
+class EventDecoder:
+    """Splits a byte stream into records as data arrives"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add received bytes and return the complete (event, raw bytes) pairs"""
+        self.buffer += data
+        records = []
+        pos = 0
+        while True:
+            decoded = decode_record(self.buffer, pos)
+            if decoded is None:
+                break
+            event, end = decoded
+            records.append((event, bytes(self.buffer[pos:end])))
+            pos = end
+        del self.buffer[:pos]
+        return records
+
+
+class SpectatorPublisher:
+    """Sends game events to a hub from a background thread so the game never waits"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_pending=4096):
+        self.address = (host, port)
+        self.encoder = EventEncoder()
+        self.pending = deque()
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.connected = False
+        self.thread = threading.Thread(target=self._run, name='spectator-publisher', daemon=True)
+        self.thread.start()
+
+    def _make_room(self, now):
+        """Restart the stream from a snapshot if the hub has fallen too far behind"""
+        if len(self.pending) >= self.max_pending:
+            # Dropping single records would leave the watchers' boards wrong for the rest of the game
+            self.pending.clear()
+            self.pending.append(self.encoder.snapshot(now))
+
+    def _emit(self, encode, *args):
+        """Encode an event on the caller's thread and queue it for sending"""
+        now = time.time()
+        with self.lock:
+            self._make_room(now)
+            self.pending.append(encode(*args, now))
+        self.wakeup.set()
+
+    def move(self, row, col, mark):
+        self._emit(self.encoder.move, row, col, mark)
+
+    def result(self, winner):
+        self._emit(self.encoder.result, winner)
+
+    def tick(self, player, seconds):
+        self._emit(self.encoder.tick, player, seconds)
+
+    def score(self, key, value):
+        self._emit(self.encoder.score, key, value)
+
+    def snapshot(self, board, player, scores):
+        """Send the full game state, e.g. at the start of a new game"""
+        now = time.time()
+        with self.lock:
+            self._make_room(now)
+            self.pending.append(self.encoder.snapshot(now, board, player, scores))
+        self.wakeup.set()
+
+    def _connect(self):
+        """Connect to the hub and restart the stream from a snapshot"""
+        sock = socket.create_connection(self.address, timeout=1.0)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(None)
+        with self.lock:
+            # Anything queued while disconnected is covered by the snapshot
+            self.pending.clear()
+            self.pending.append(self.encoder.snapshot(time.time()))
+        sock.sendall(ROLE_PUBLISHER)
+        return sock
+
+    def _run(self):
+        """Send queued records, reconnecting to the hub when needed"""
+        sock = None
+        while True:
+            if sock is None:
+                if self.closed:
+                    break
+                try:
+                    sock = self._connect()
+                    self.connected = True
+                except OSError:
+                    self.connected = False
+                    time.sleep(1.0)
+                    continue
+
+            self.wakeup.wait(0.5)
+            self.wakeup.clear()
+            with self.lock:
+                batch = b''.join(self.pending)
+                self.pending.clear()
+            if batch:
+                try:
+                    sock.sendall(batch)
+                except OSError:
+                    sock.close()
+                    sock = None
+                    self.connected = False
+            if self.closed:
+                break
+        if sock is not None:
+            sock.close()
+
+    def close(self):
+        """Flush what is queued and stop the background thread"""
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join(timeout=2.0)
+
+
+class SpectatorHub:
+    """Fans the publisher's records out to every subscriber with one selector loop"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.create_server((host, port), backlog=4096)
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.connections = {}  # socket -> connection state
+        self.publisher = None  # Only one game is streamed at a time
+        self.subscribers = set()
+        self.backlog = []  # Records since the last snapshot, replayed to new subscribers
+        self.running = False
+
+    def serve_forever(self):
+        """Run the hub until stop() is called"""
+        self.running = True
+        while self.running:
+            for key, mask in self.selector.select(timeout=0.5):
+                if key.fileobj is self.listener:
+                    self._accept()
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self._read(key.fileobj)
+                if mask & selectors.EVENT_WRITE and key.fileobj in self.connections:
+                    self._flush(key.fileobj)
+        for sock in list(self.connections):
+            self._drop(sock)
+        self.selector.unregister(self.listener)
+        self.listener.close()
+
+    def stop(self):
+        self.running = False
+
+    def _accept(self):
+        """Accept pending connections; their role arrives as the first byte"""
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connections[sock] = {'role': None, 'out': bytearray(), 'decoder': EventDecoder()}
+            self.selector.register(sock, selectors.EVENT_READ)
+
+    def _read(self, sock):
+        """Handle data from a connection"""
+        state = self.connections.get(sock)
+        if state is None:
+            return
+        try:
+            data = sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(sock)
+            return
+
+        if state['role'] is None:
+            state['role'], data = data[:1], data[1:]
+            if state['role'] == ROLE_SUBSCRIBER:
+                self.subscribers.add(sock)
+                self._send(sock, b''.join(self.backlog))
+            elif state['role'] == ROLE_PUBLISHER and self.publisher is None:
+                self.publisher = sock
+            else:
+                # Unknown role, or a second game that would interleave with the first
+                self._drop(sock)
+                return
+        if state['role'] == ROLE_PUBLISHER and data:
+            try:
+                records = state['decoder'].feed(data)
+            except ValueError:
+                self._drop(sock)  # Malformed stream, the other connections carry on
+                return
+            self._publish(records)
+
+    def _publish(self, records):
+        """Remember the records new subscribers need and send them to everyone"""
+        for event, raw in records:
+            if event[0] == 'snapshot':
+                self.backlog = [raw]
+            elif event[0] != 'tick':  # Timer ticks are only interesting live
+                self.backlog.append(raw)
+        payload = b''.join(raw for _, raw in records)
+        if payload:
+            for sock in list(self.subscribers):
+                self._send(sock, payload)
+
+    def _send(self, sock, payload):
+        """Queue payload for a subscriber and send as much as it will take now"""
+        state = self.connections[sock]
+        was_waiting = bool(state['out'])
+        state['out'] += payload
+        if len(state['out']) > MAX_SUBSCRIBER_BUFFER:
+            self._drop(sock)  # Too slow to keep up with the game
+            return
+        if not was_waiting:
+            self._flush(sock)
+
+    def _flush(self, sock):
+        """Write a subscriber's queued bytes, waiting for the socket if it is full"""
+        state = self.connections[sock]
+        out = state['out']
+        try:
+            sent = sock.send(out) if out else 0
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(sock)
+            return
+        del out[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if out else 0)
+        if self.selector.get_key(sock).events != events:
+            self.selector.modify(sock, events)
+
+    def _drop(self, sock):
+        """Forget a connection"""
+        self.connections.pop(sock, None)
+        self.subscribers.discard(sock)
+        if sock is self.publisher:
+            self.publisher = None
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+
+def subscribe(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Connect to a hub as a subscriber"""
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.sendall(ROLE_SUBSCRIBER)
+    return sock
+
+
+def watch(args):
+    """Print the events of the live game"""
+    sock = subscribe(args.host, args.port)
+    decoder = EventDecoder()
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            print("Hub closed the connection.")
+            return
+        for event, _ in decoder.feed(data):
+            print(*event)
+
+
+def raise_file_limit(needed):
+    """Raise the open file limit where the platform allows it"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def bench_round(subscribers, events, rate, stride):
+    """Publish events to a number of subscribers and measure throughput and latency"""
+    hub = SpectatorHub(port=0)
+    hub_thread = threading.Thread(target=hub.serve_forever, daemon=True)
+    hub_thread.start()
+    host, port = hub.address[:2]
+
+    socks = [subscribe(host, port) for _ in range(subscribers)]
+    while len(hub.subscribers) < subscribers:
+        time.sleep(0.01)
+
+    send_times = [0.0] * events
+    latencies = []
+    finished = threading.Event()
+
+    def receive():
+        """Count every subscriber's records and sample their latency"""
+        selector = selectors.DefaultSelector()
+        counts = {}
+        for sock in socks:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ, EventDecoder())
+            counts[sock] = 0
+        remaining = subscribers
+        deadline = time.monotonic() + 60
+        while remaining and time.monotonic() < deadline:
+            for key, _ in selector.select(timeout=0.5):
+                now = time.monotonic()
+                try:
+                    data = key.fileobj.recv(65536)
+                except BlockingIOError:
+                    continue
+                for event, _ in key.data.feed(data):
+                    if event[0] != 'tick':
+                        continue  # The publisher's opening snapshot is not measured
+                    index = counts[key.fileobj]
+                    if index % stride == 0:
+                        latencies.append(now - send_times[index])
+                    counts[key.fileobj] = index + 1
+                    if index + 1 == events:
+                        remaining -= 1
+        selector.close()
+        finished.set()
+
+    receiver = threading.Thread(target=receive, daemon=True)
+    receiver.start()
+
+    publisher = SpectatorPublisher(host, port)
+    while not publisher.connected:
+        time.sleep(0.01)
+    time.sleep(0.1)  # Let the opening snapshot reach the subscribers before timing
+
+    interval = 1.0 / rate if rate else 0.0
+    start = time.monotonic()
+    for index in range(events):
+        if interval:
+            delay = start + index * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        send_times[index] = time.monotonic()
+        publisher.tick('X' if index % 2 else 'O', index % 10)
+    finished.wait()
+    elapsed = time.monotonic() - start
+
+    publisher.close()
+    hub.stop()
+    hub_thread.join()
+    for sock in socks:
+        sock.close()
+
+    latencies.sort()
+    return {
+        'delivered': subscribers * events / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        'max': latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def bench(args):
+    """Report events per second and latency as the subscriber count grows"""
+    raise_file_limit(2 * max(args.subscribers) + 64)
+    print(f"{args.events} events per round, publish rate "
+          f"{args.rate or 'unlimited'}{' events/s' if args.rate else ''}")
+    print("subscribers   delivered/s   p50 ms   p99 ms   max ms")
+    for subscribers in args.subscribers:
+        result = bench_round(subscribers, args.events, args.rate, args.stride)
+        print(f"{subscribers:11d}   {result['delivered']:11.0f}   {result['p50']:6.2f}   "
+              f"{result['p99']:6.2f}   {result['max']:6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectator stream hub, viewer and benchmark")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('hub', help="run the fan-out hub")
+    commands.add_parser('watch', help="print the live events")
+    bench_parser = commands.add_parser('bench', help="benchmark fan-out throughput and latency")
+    bench_parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 10, 100, 1000])
+    bench_parser.add_argument('--events', type=int, default=2000, help="events per round")
+    bench_parser.add_argument('--rate', type=int, default=1000,
+                              help="events published per second, 0 for as fast as possible")
+    bench_parser.add_argument('--stride', type=int, default=10,
+                              help="sample the latency of every Nth event")
+    args = parser.parse_args()
+
+    if args.command == 'hub':
+        hub = SpectatorHub(args.host, args.port)
+        print(f"Spectator hub listening on {args.host}:{args.port}")
+        try:
+            hub.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'watch':
+        try:
+            watch(args)
+        except KeyboardInterrupt:
+            pass
+    else:
+        bench(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Self-play Q-learning trainer for the 'Learned' AI difficulty.
+
+Runs batches of games side by side with numpy on the CPU, logs throughput
+and convergence per epoch, and exports the policy as a table that
+policy_table.load_policy() can read. Self-play finds perfect play well
+within the default game count, so to play below the 'Hard' difficulty the
+exported move for each position is sampled from a softmax over its Q
+values, which bakes in an occasional mistake.
+
+    python3 train_policy.py --games 200000 --log training.csv
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from policy_table import NO_MOVE, NUM_CELLS, NUM_POSITIONS, POLICY_FILE, SYMMETRIES
+
+LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
+    [0, 4, 8], [2, 4, 6],             # diagonals
+])
+POW3 = 3 ** np.arange(NUM_CELLS)
+PERMS = np.array(SYMMETRIES)
+DIGITS = (np.arange(NUM_POSITIONS)[:, None] // POW3) % 3
+EXPORT_TEMPERATURE = 0.3  # Keeps the exported policy below 'Hard'
+
+
+def build_canonical_tables():
+    """Map every position index to its canonical index and symmetry"""
+    sym_indices = DIGITS[:, PERMS] @ POW3  # (positions, symmetries)
+    sym = np.argmin(sym_indices, axis=1)
+    canon = sym_indices[np.arange(NUM_POSITIONS), sym]
+    return canon, sym
+
+
+CANON, SYM = build_canonical_tables()
+LEGAL = DIGITS == 0
+
+
+def swap_sides(boards):
+    """Flip boards to the other player's point of view"""
+    return np.where(boards == 0, 0, 3 - boards).astype(np.int8)
+
+
+def has_won(boards):
+    """Check which boards contain a line of the mover's marks"""
+    return (boards[:, LINES] == 1).all(axis=2).any(axis=1)
+
+
+def random_legal(legal, rng):
+    """Pick a random legal cell for each row of a legal-move mask"""
+    return np.argmax(np.where(legal, rng.random(legal.shape), -1.0), axis=1)
+
+
+def greedy_legal(q_values, legal):
+    """Pick the highest valued legal cell for each row"""
+    return np.argmax(np.where(legal, q_values, -np.inf), axis=1)
+
+
+def choose_moves(q_table, boards, epsilon, rng):
+    """Pick an epsilon-greedy move for every board in the batch"""
+    index = boards @ POW3
+    canon, sym = CANON[index], SYM[index]
+    legal = LEGAL[canon]
+    actions = greedy_legal(q_table[canon], legal)
+    if epsilon > 0:
+        explore = rng.random(len(boards)) < epsilon
+        actions = np.where(explore, random_legal(legal, rng), actions)
+    return canon, actions, PERMS[sym, actions]
+
+
+def self_play_step(q_table, boards, epsilon, alpha, rng):
+    """Play one move in every game and apply the batched TD update"""
+    canon, actions, cells = choose_moves(q_table, boards, epsilon, rng)
+    rows = np.arange(len(boards))
+    boards[rows, cells] = 1
+
+    won = has_won(boards)
+    done = won | (boards != 0).all(axis=1)
+    next_boards = swap_sides(boards)
+
+    # Negamax target: the opponent's best value is our loss
+    next_canon = CANON[next_boards @ POW3]
+    next_q = np.where(LEGAL[next_canon], q_table[next_canon], -np.inf).max(axis=1)
+    target = np.where(done, won.astype(np.float32), -np.where(done, 0.0, next_q))
+    td_error = target - q_table[canon, actions]
+
+    # Average duplicate (state, action) updates within the batch
+    flat = canon * NUM_CELLS + actions
+    sums = np.bincount(flat, weights=td_error, minlength=q_table.size)
+    counts = np.bincount(flat, minlength=q_table.size)
+    touched = counts > 0
+    q_table.reshape(-1)[touched] += alpha * sums[touched] / counts[touched]
+
+    next_boards[done] = 0
+    return next_boards, int(done.sum()), float(np.abs(td_error).mean())
+
+
+def evaluate(q_table, games, rng):
+    """Play the greedy policy against a random opponent, returning win/draw/loss rates"""
+    boards = np.zeros((games, NUM_CELLS), dtype=np.int8)
+    policy_turn = np.arange(games) % 2 == 0  # policy moves first in half the games
+    result = np.zeros(games, dtype=np.int8)  # 1 policy win, 0 draw, -1 loss
+    active = np.ones(games, dtype=bool)
+
+    for _ in range(NUM_CELLS):
+        live = np.flatnonzero(active)
+        if len(live) == 0:
+            break
+        _, _, policy_cells = choose_moves(q_table, boards[live], 0.0, rng)
+        random_cells = random_legal(boards[live] == 0, rng)
+        cells = np.where(policy_turn[live], policy_cells, random_cells)
+        boards[live, cells] = 1
+
+        won = has_won(boards[live])
+        full = (boards[live] != 0).all(axis=1)
+        result[live[won]] = np.where(policy_turn[live[won]], 1, -1)
+        active[live[won | full]] = False
+
+        boards[live] = swap_sides(boards[live])
+        policy_turn[live] = ~policy_turn[live]
+
+    return (result == 1).mean(), (result == 0).mean(), (result == -1).mean()
+
+
+def sample_legal(q_values, legal, temperature, rng):
+    """Pick a legal cell for each row with probability following a softmax of its value"""
+    q_values = np.where(legal, q_values, -np.inf)
+    weights = np.exp((q_values - q_values.max(axis=1, keepdims=True)) / temperature)
+    cumulative = weights.cumsum(axis=1) / weights.sum(axis=1, keepdims=True)
+    return np.argmax(cumulative > rng.random((len(q_values), 1)), axis=1)
+
+
+def export_policy(q_table, path, temperature=0.0, rng=None):
+    """Write one move for every canonical position to a policy table
+
+    With a temperature of 0 the move is the greedy one, otherwise it is
+    sampled once per position from a softmax of the Q values.
+    """
+    table = np.full(NUM_POSITIONS, NO_MOVE, dtype=np.uint8)
+    canonical_states = np.unique(CANON)
+    playable = canonical_states[LEGAL[canonical_states].any(axis=1)]
+    if temperature > 0:
+        table[playable] = sample_legal(q_table[playable], LEGAL[playable], temperature, rng)
+    else:
+        table[playable] = greedy_legal(q_table[playable], LEGAL[playable])
+    with open(path, 'wb') as f:
+        f.write(table.tobytes())
+    return len(playable)
+
+
+def train(args):
+    """Run self-play training and export the resulting policy"""
+    rng = np.random.default_rng(args.seed)
+    q_table = np.zeros((NUM_POSITIONS, NUM_CELLS), dtype=np.float32)
+    boards = np.zeros((args.batch, NUM_CELLS), dtype=np.int8)
+    games_per_epoch = max(1, args.games // args.epochs)
+    history = []
+
+    print(f"Training {args.games} games in batches of {args.batch} (CPU)")
+    print("epoch    games  games/s  epsilon  td_error  win  draw  loss")
+    total_games = 0
+    for epoch in range(1, args.epochs + 1):
+        # Linearly decay exploration towards the final epsilon
+        fraction = (epoch - 1) / max(1, args.epochs - 1)
+        epsilon = args.epsilon + (args.final_epsilon - args.epsilon) * fraction
+
+        start = time.perf_counter()
+        finished, steps, td_total = 0, 0, 0.0
+        while finished < games_per_epoch:
+            boards, done, td_error = self_play_step(q_table, boards, epsilon, args.alpha, rng)
+            finished += done
+            td_total += td_error
+            steps += 1
+        elapsed = time.perf_counter() - start
+        total_games += finished
+
+        win, draw, loss = evaluate(q_table, args.eval_games, rng)
+        row = {
+            'epoch': epoch,
+            'games': total_games,
+            'games_per_sec': finished / elapsed,
+            'epsilon': epsilon,
+            'td_error': td_total / steps,
+            'win': win,
+            'draw': draw,
+            'loss': loss,
+        }
+        history.append(row)
+        print(f"{epoch:5d}  {total_games:7d}  {row['games_per_sec']:7.0f}  {epsilon:7.3f}  "
+              f"{row['td_error']:8.4f}  {win:.2f}  {draw:.2f}  {loss:.2f}")
+
+    if args.log:
+        with open(args.log, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(history[0]))
+            writer.writeheader()
+            writer.writerows(history)
+        print(f"Convergence log written to {args.log}")
+
+    positions = export_policy(q_table, args.output, args.temperature, rng)
+    print(f"Exported policy for {positions} canonical positions to {args.output} "
+          f"(temperature {args.temperature})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the Learned AI by self-play Q-learning")
+    parser.add_argument('--games', type=int, default=200000, help="total self-play games")
+    parser.add_argument('--batch', type=int, default=512, help="games played side by side")
+    parser.add_argument('--epochs', type=int, default=20, help="logging/evaluation intervals")
+    parser.add_argument('--alpha', type=float, default=0.3, help="learning rate")
+    parser.add_argument('--epsilon', type=float, default=1.0, help="initial exploration rate")
+    parser.add_argument('--final-epsilon', type=float, default=0.05, help="final exploration rate")
+    parser.add_argument('--temperature', type=float, default=EXPORT_TEMPERATURE,
+                        help="softmax temperature for the exported moves, 0 for greedy play")
+    parser.add_argument('--eval-games', type=int, default=2000, help="evaluation games per epoch")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--output', default=POLICY_FILE, help="policy table to write")
+    parser.add_argument('--log', default=None, help="CSV file for the convergence curve")
+    train(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()